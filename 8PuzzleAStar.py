@@ -1,7 +1,16 @@
-import copy
+import argparse
+from array import array
+from bisect import bisect_left
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from heapq import heappop, heappush
+import json
+import mmap
 import os
-from queue import PriorityQueue
 import random
+import re
+import sys
+import tempfile
 import time
 
 def clearConsole():
@@ -13,39 +22,40 @@ def clearConsole():
         command = 'clear' # Users on MacOS
     os.system(command)
 
-class State:
-    def __init__(self, grid, g, laststate):
-        """Class Initialiser.
-        
-        Keyword arguments:
-        grid -- the (typically 3x3) grid that is found at the current state.
-        g -- the g value for the state.
-        laststate -- the parent state of the current state.
-        """
-        self.grid = grid # Grid (Typically 3 x 3)
-        self.f = g + heuristic(grid) # f = g + h
-        self.g = g # Number of nodes traversed to get to node
-        self.h = heuristic(grid) # Heuristic calculated by chosen method
-        self.ls = laststate # Last State visited
-    
-    def __lt__(self, other):
-        """Used for comparisons."""
-        return False # Causes errors otherwise
+tablesdirectory = os.path.join(os.path.dirname(os.path.abspath(__file__)), "tables") # Where precomputed heuristic tables are saved
 
-
-def setupgrid(input):
+def setupgrid(input, rows, cols):
     """Sets up the grids for the start and target states.
         
     Keyword arguments:
     input - a list of values to be placed into the grid.
+    rows -- the number of rows.
+    cols -- the number of columns.
     """
     grid = [[0 for i in range(cols)] for j in range(rows)]
-    for a in range(cols):
-        for b in range(rows):
-            grid[a][b] = input[(a*cols+b)] # makes grid of size cols x rows with input from a list.
+    for a in range(rows):
+        for b in range(cols):
+            grid[a][b] = input[(a*cols+b)] # makes grid of size rows x cols with input from a list.
 
     return grid
 
+def packgrid(grid):
+    """Packs a grid into a compact hashable form (one byte per tile, read row by row).
+        
+    Keyword arguments:
+    grid -- the grid to be packed.
+    """
+    return bytes(tile for row in grid for tile in row)
+
+def unpackgrid(packed, cols):
+    """Unpacks a packed grid back into a list of rows.
+        
+    Keyword arguments:
+    packed -- the packed grid to be unpacked.
+    cols -- the number of columns.
+    """
+    return [list(packed[i:i+cols]) for i in range(0, len(packed), cols)]
+
 def printgrid(grid):
     """Prints the grid.
         
@@ -56,80 +66,519 @@ def printgrid(grid):
         print(row) # Prints the grid in a nicer format
     print()
 
-def printfgh(state):
-    """Prints the info about the given state.
-        
-    Keyword arguments:
-    state -- the state.
-    """
-    printgrid(state.grid) # print grid
-    print("f(n): " + str(state.f)) # print f value
-    print("g(n): " + str(state.g)) # print g value
-    print("h(n): " + str(state.h)) # print h value
+heuristicnames = ["Misplaced Squares", "Manhattan Distance", "Double Misplaced Squares (Not Admissable)", "Linear Conflict", "Pattern Database (Additive, built on first use)", "Exact Distance Table (Up to 3x3, built on first use)"]
 
-def inputh():
+def inputh(size=9):
+    # The exact distance table (the last choice) is only offered for boards of up to 9 positions
+    choices = len(heuristicnames) if size <= 9 else len(heuristicnames) - 1
     correcth = False
     while correcth == False:
         # Let user choose heuristic
         print("Please choose a heuristic method: ")
-        print("0. Misplaced Squares")
-        print("1. Manhattan Distance")
-        print("2. Double Misplaced Squares (Not Admissable)")
+        for number, name in enumerate(heuristicnames[:choices]):
+            print(str(number) + ". " + name)
         h = int(input())
-        if h in range (0,3):
+        if h in range (0,choices):
             correcth = True
     return h
 
-def heuristic(grid):
-    """Finds the h value for a given grid.
+def longestincreasing(sequence):
+    """Finds the length of the longest increasing subsequence of a list of numbers.
         
     Keyword arguments:
-    grid -- the grid to find the h value for.
+    sequence -- the list of numbers.
     """
-    if h == 0:
-        return hms(grid) # Misplaced Squares
-    elif h == 1:
-        return hmd(grid) # Manhattan Distance
-    elif h == 2:
-        return hms(grid)*2 # Double Misplaced Squares
-    else:
-        return 0  # Otherwise No Heuristic
+    tails = [] # Smallest tail of each increasing subsequence length found so far
+    for value in sequence:
+        i = bisect_left(tails, value)
+        if i == len(tails):
+            tails.append(value)
+        else:
+            tails[i] = value
+    return len(tails)
+
+neighbourtables = {} # Neighbour tables already built, keyed on (rows, cols)
 
-def hms(grid):
-    """Finds the Misplaced Squares heuristic value for a given grid.
+def neighbourtable(rows, cols):
+    """Lists the positions next to each position of a packed grid (above, below, left then right).
+    Each board shape's table is only built once.
         
     Keyword arguments:
-    grid -- the grid to find the Misplaced Squares heuristic value for.
+    rows -- the number of rows.
+    cols -- the number of columns.
     """
-    counter = cols * rows # Maximum number of tiles in the correct place
-    for i in range(cols):
-        for j in range(rows):
-            if grid[i][j] == targetgrid[i][j]: # If tile in correct place
-                if grid[i][j] == 0 or targetgrid[i][j] == 0: # Makes sure it's a tile and not the gap.
-                    continue
+    if (rows, cols) in neighbourtables:
+        return neighbourtables[(rows, cols)]
+    neighbours = []
+    for pos in range(rows*cols):
+        a, b = divmod(pos, cols)
+        near = []
+        if a != 0:
+            near.append(pos-cols) # Above
+        if a != rows-1:
+            near.append(pos+cols) # Below
+        if b != 0:
+            near.append(pos-1) # Left
+        if b != cols-1:
+            near.append(pos+1) # Right
+        neighbours.append(tuple(near))
+    neighbourtables[(rows, cols)] = tuple(neighbours)
+    return neighbourtables[(rows, cols)]
+
+def rankpositions(positions, size):
+    """Ranks the positions of a pattern's tiles into a compact index (0 to size!/(size-k)! - 1).
+        
+    Keyword arguments:
+    positions -- the distinct positions of the k pattern tiles, in pattern order.
+    size -- the number of positions in the grid.
+    """
+    rank = 0
+    for i, pos in enumerate(positions):
+        digit = pos
+        for j in range(i):
+            if positions[j] < pos:
+                digit -= 1 # Positions already used earlier can't be used again
+        rank = rank * (size - i) + digit
+    return rank
+
+def defaultpartition(target, rows, cols):
+    """Splits the tiles into disjoint patterns of at most 5 tiles, grouped by where they sit in the target.
+        
+    Keyword arguments:
+    target -- the packed target grid.
+    rows -- the number of rows.
+    cols -- the number of columns.
+    """
+    tiles = [tile for tile in target if tile != 0] # Tiles in the order they appear in the target
+    groups = -(-len(tiles) // 5)
+    partition = []
+    start = 0
+    for i in range(groups):
+        end = start + (len(tiles) - start) // (groups - i) # Keeps the patterns as even as possible
+        partition.append(tuple(tiles[start:end]))
+        start = end
+    return partition
+
+def buildpdb(target, rows, cols, pattern):
+    """Builds an additive pattern database for one pattern, returning a bytearray indexed by rankpositions.
+    Only moves of the pattern's own tiles are counted, so databases for disjoint patterns can be added together.
+        
+    Keyword arguments:
+    target -- the packed target grid.
+    rows -- the number of rows.
+    cols -- the number of columns.
+    pattern -- the tiles in the pattern.
+    """
+    size = rows * cols
+    k = len(pattern)
+    neighbours = neighbourtable(rows, cols)
+    powers = [size**i for i in range(k)]
+    # Search states are code * size + blank, where code holds the pattern tiles' positions in base size
+    start = sum(target.index(tile) * powers[i] for i, tile in enumerate(pattern))
+    best = bytearray(b"\xff") * (size**k) # Fewest pattern moves for each code
+    seen = bytearray(size**(k+1))
+    frontier = [start * size + target.index(0)]
+    distance = 0
+    while frontier:
+        nextfrontier = [] # States one pattern move further away
+        stack = frontier
+        while stack:
+            state = stack.pop()
+            if seen[state]:
+                continue
+            seen[state] = 1
+            code, blank = divmod(state, size)
+            if best[code] == 255:
+                best[code] = distance # Layers are done in order, so the first visit is the fewest moves
+            occupant = {}
+            rest = code
+            for i in range(k):
+                rest, pos = divmod(rest, size)
+                occupant[pos] = i
+            for pos in neighbours[blank]:
+                i = occupant.get(pos)
+                if i is None:
+                    stack.append(code * size + pos) # Moving a tile outside the pattern is free
                 else:
-                    counter -= 1 # Remove 1 from counter of tiles out of place
-    return counter
+                    nextfrontier.append((code + (blank - pos) * powers[i]) * size + pos) # Pattern tile slides into the gap
+        frontier = nextfrontier
+        distance += 1
+    # Repack from base size codes to compact ranks
+    count = 1
+    for i in range(k):
+        count *= size - i # size!/(size-k)! ways to place the pattern
+    table = bytearray(b"\xff") * count
+    for code, value in enumerate(best):
+        if value != 255:
+            positions = []
+            rest = code
+            for i in range(k):
+                rest, pos = divmod(rest, size)
+                positions.append(pos)
+            table[rankpositions(positions, size)] = value
+    return table
+
+def pdbfilename(target, rows, cols, pattern):
+    """Finds the file a pattern database is stored in.
+        
+    Keyword arguments:
+    target -- the packed target grid.
+    rows -- the number of rows.
+    cols -- the number of columns.
+    pattern -- the tiles in the pattern.
+    """
+    name = "pdb-%dx%d-%s-%s.bin" % (rows, cols, target.hex(), bytes(pattern).hex())
+    return os.path.join(tablesdirectory, name)
+
+def savetable(table, filename):
+    """Writes a table to the tables directory through a temporary file of its own, so processes building
+    the same table at once never see (or replace) each other's part written files.
+        
+    Keyword arguments:
+    table -- the table's bytes.
+    filename -- the file to save it to.
+    """
+    os.makedirs(tablesdirectory, exist_ok=True)
+    with tempfile.NamedTemporaryFile(dir=tablesdirectory, delete=False) as f:
+        f.write(table)
+    umask = os.umask(0) # Only readable by its creator otherwise, so other users couldn't share the table
+    os.umask(umask)
+    os.chmod(f.name, 0o666 & ~umask)
+    os.replace(f.name, filename) # Only complete files are ever seen
+
+def loadpdb(target, rows, cols, pattern):
+    """Loads a pattern database through a read-only memory map, building and saving it first if needed.
+        
+    Keyword arguments:
+    target -- the packed target grid.
+    rows -- the number of rows.
+    cols -- the number of columns.
+    pattern -- the tiles in the pattern.
+    """
+    filename = pdbfilename(target, rows, cols, pattern)
+    if not os.path.exists(filename):
+        # To stderr, so it can't end up among the JSON lines batch mode writes to stdout
+        sys.stderr.write("Building pattern database for tiles " + str(list(pattern)) + ", this is only done once...\n")
+        savetable(buildpdb(target, rows, cols, pattern), filename)
+    with open(filename, "rb") as f:
+        return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) # The map stays valid after the file is closed
 
-def hmd(grid):
-    """Finds the Manhattan Distance heuristic value for a given grid.
+def unrankpositions(rank, size):
+    """Turns a rank from rankpositions (of a whole grid, so every position is used) back into the packed grid.
         
     Keyword arguments:
-    grid -- the grid to find the Manhattan Distance heuristic value for.
+    rank -- the rank.
+    size -- the number of positions in the grid.
     """
-    counter = 0
-    for i in range ((cols*rows)):
-        for j in range(cols):
-            for k in range(rows):
-                if grid[j][k] == i:
-                    a, b = j,k # position of values in grid
-                if targetgrid[j][k] == i:
-                    c,d = j,k # position of values are supposed to be
+    digits = []
+    for i in range(size-1, -1, -1): # Digits were added with bases size, size-1, ..., 1
+        rank, digit = divmod(rank, size - i)
+        digits.append(digit)
+    digits.reverse()
+    unused = list(range(size))
+    return bytes(unused.pop(digit) for digit in digits) # Each digit counts the smaller values not used yet
+
+def builddistancetable(target, rows, cols):
+    """Finds the exact number of moves to the target from every grid, by breadth first search back from the target.
+    Returns a bytearray indexed by rankpositions(grid) (255 where the target can't be reached).
+        
+    Keyword arguments:
+    target -- the packed target grid.
+    rows -- the number of rows.
+    cols -- the number of columns.
+    """
+    size = rows * cols
+    neighbours = neighbourtable(rows, cols)
+    count = 1
+    for i in range(2, size+1):
+        count *= i
+    table = bytearray(b"\xff") * count
+    table[rankpositions(target, size)] = 0
+    frontier = [target]
+    distance = 0
+    while frontier:
+        distance += 1
+        nextfrontier = []
+        for grid in frontier:
+            blank = grid.index(0)
+            for pos in neighbours[blank]:
+                move = swaptiles(grid, blank, pos)
+                rank = rankpositions(move, size)
+                if table[rank] == 255:
+                    table[rank] = distance
+                    nextfrontier.append(move)
+        frontier = nextfrontier
+    return table
+
+def loaddistancetable(target, rows, cols):
+    """Loads the exact distance table for a target through a read-only memory map, building and saving it first if needed.
+    Only boards of up to 9 positions are allowed, as the table has one byte for every ordering of the tiles.
+        
+    Keyword arguments:
+    target -- the packed target grid.
+    rows -- the number of rows.
+    cols -- the number of columns.
+    """
+    if rows * cols > 9:
+        raise ValueError("the exact distance table is only available for boards of up to 9 positions")
+    filename = os.path.join(tablesdirectory, "distances-%dx%d-%s.bin" % (rows, cols, target.hex()))
+    if not os.path.exists(filename):
+        sys.stderr.write("Building exact distance table, this is only done once...\n")
+        savetable(builddistancetable(target, rows, cols), filename)
+    with open(filename, "rb") as f:
+        return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+def tablesolve(start, target, table, rows, cols, stats=None):
+    """Solves the puzzle with no search, by always moving to a neighbouring grid one move closer in the exact distance table.
+    Returns the list of packed grids from start to target (None if there is no solution) and the number of nodes expanded.
+        
+    Keyword arguments:
+    start -- the packed starting grid.
+    target -- the packed target grid.
+    table -- the exact distance table for the target (see loaddistancetable).
+    rows -- the number of rows.
+    cols -- the number of columns.
+    stats -- the SearchStats to count into (optional).
+    """
+    if stats is None:
+        stats = SearchStats()
+    size = rows * cols
+    neighbours = neighbourtable(rows, cols)
+    distance = table[rankpositions(start, size)]
+    if distance == 255:
+        stats.finish(None, 0)
+        return None, 0
+    solution = [start]
+    grid = start
+    while distance != 0:
+        blank = grid.index(0)
+        stats.expanded += 1
+        for pos in neighbours[blank]:
+            stats.generated += 1
+            move = swaptiles(grid, blank, pos)
+            if table[rankpositions(move, size)] == distance - 1:
+                break # One move closer
+        grid = move
+        distance -= 1
+        solution.append(grid)
+    stats.finish(solution, 0)
+    return solution, stats.expanded
+
+class HeuristicEngine:
+    def __init__(self, target, rows, cols, choice, partition=None):
+        """Class Initialiser. Precomputes the goal position tables for a target grid.
+        
+        Keyword arguments:
+        target -- the packed target grid.
+        rows -- the number of rows.
+        cols -- the number of columns.
+        choice -- the heuristic choice (see heuristicnames).
+        partition -- the disjoint tile patterns for the Pattern Database heuristic (defaultpartition if not given).
+        """
+        self.target = target
+        self.rows = rows
+        self.cols = cols
+        self.choice = choice
+        size = rows * cols
+        self.goalrow = [0] * size # Row each tile is supposed to be in
+        self.goalcol = [0] * size # Column each tile is supposed to be in
+        for pos, tile in enumerate(target):
+            self.goalrow[tile], self.goalcol[tile] = divmod(pos, cols)
+        # Manhattan distance of every tile from every position, indexed by tile * size + position
+        self.distance = [0] * (size * size)
+        for tile in range(1, size): # The gap is not counted
+            for pos in range(size):
+                a, b = divmod(pos, cols)
+                self.distance[tile*size+pos] = abs(a - self.goalrow[tile]) + abs(b - self.goalcol[tile])
+        self.rowcells = [range(a*cols, (a+1)*cols) for a in range(rows)] # Positions in each row
+        self.colcells = [range(b, size, cols) for b in range(cols)] # Positions in each column
+        if choice == 4:
+            self.patterns = partition or defaultpartition(target, rows, cols)
+            self.pdbs = [loadpdb(target, rows, cols, pattern) for pattern in self.patterns]
+            self.patternof = [None] * size # Which pattern each tile belongs to
+            for number, pattern in enumerate(self.patterns):
+                for tile in pattern:
+                    self.patternof[tile] = number
+        if choice == 5:
+            self.distances = loaddistancetable(target, rows, cols)
+
+    def evaluate(self, grid):
+        """Finds the h value for a given grid from scratch.
+        
+        Keyword arguments:
+        grid -- the packed grid to find the h value for.
+        """
+        if self.choice == 0:
+            return self.hms(grid) # Misplaced Squares
+        elif self.choice == 1:
+            return self.hmd(grid) # Manhattan Distance
+        elif self.choice == 2:
+            return self.hms(grid)*2 # Double Misplaced Squares
+        elif self.choice == 3:
+            return self.hmd(grid) + self.hlc(grid) # Linear Conflict
+        elif self.choice == 4:
+            return self.hpdb(grid) # Pattern Database
+        elif self.choice == 5:
+            return self.distances[rankpositions(grid, len(grid))] # Exact Distance
+        else:
+            return 0  # Otherwise No Heuristic
+
+    def childh(self, parenth, grid, frompos, topos):
+        """Finds the h value of a child from its parent's h value and the single tile that moved.
+        
+        Keyword arguments:
+        parenth -- the h value of the parent grid.
+        grid -- the packed parent grid (before the move).
+        frompos -- the position of the tile that slides into the gap.
+        topos -- the position of the gap in the parent grid.
+        """
+        tile = grid[frompos]
+        if self.choice in (0, 2):
+            target = self.target
+            delta = (target[frompos] == tile) - (target[topos] == tile) # +1 if tile leaves its place, -1 if it arrives
+            return parenth + delta if self.choice == 0 else parenth + 2*delta
+        elif self.choice in (1, 3):
+            size = len(grid)
+            delta = self.distance[tile*size+topos] - self.distance[tile*size+frompos]
+            if self.choice == 3:
+                if frompos - topos in (1, -1): # Moved along a row, so only the two columns change
+                    lines = (frompos % self.cols, self.colcells), (topos % self.cols, self.colcells)
+                    goal, goalline = self.goalrow, self.goalcol
+                else: # Moved along a column, so only the two rows change
+                    lines = (frompos // self.cols, self.rowcells), (topos // self.cols, self.rowcells)
+                    goal, goalline = self.goalcol, self.goalrow
+                for here, cells in lines:
+                    delta += self.lineconflict(grid, here, cells[here], goal, goalline, frompos, topos, tile)
+                    delta -= self.lineconflict(grid, here, cells[here], goal, goalline)
+            return parenth + delta
+        elif self.choice == 4:
+            number = self.patternof[tile]
+            pattern, table = self.patterns[number], self.pdbs[number]
+            positions = [grid.index(t) for t in pattern]
+            before = table[rankpositions(positions, len(grid))]
+            positions[pattern.index(tile)] = topos
+            return parenth + table[rankpositions(positions, len(grid))] - before # Only the moved tile's pattern changes
+        elif self.choice == 5:
+            return self.distances[rankpositions(swaptiles(grid, topos, frompos), len(grid))]
+        else:
+            return 0  # Otherwise No Heuristic
+
+    def hms(self, grid):
+        """Finds the Misplaced Squares heuristic value for a given grid.
+        
+        Keyword arguments:
+        grid -- the packed grid to find the Misplaced Squares heuristic value for.
+        """
+        counter = 0
+        for tile, goal in zip(grid, self.target):
+            if tile != goal and tile != 0: # If tile out of place (the gap is not a tile)
+                counter += 1
+        return counter
+
+    def hmd(self, grid):
+        """Finds the Manhattan Distance heuristic value for a given grid.
+        
+        Keyword arguments:
+        grid -- the packed grid to find the Manhattan Distance heuristic value for.
+        """
+        size = len(grid)
+        distance = self.distance
+        counter = 0
+        for pos, tile in enumerate(grid):
+            counter += distance[tile*size+pos] # Manhattan distance of the tile (0 for the gap)
+        return counter
 
-        offby = (abs(c-a) + abs(d-b)) # calculate the Manhattan distance of the value 
-        counter += offby # increase the counter by value's Manhattan distance
+    def hlc(self, grid):
+        """Finds the extra moves the Linear Conflict heuristic adds on top of the Manhattan Distance.
+        
+        Keyword arguments:
+        grid -- the packed grid to find the linear conflicts of.
+        """
+        counter = 0
+        for a, line in enumerate(self.rowcells):
+            counter += self.lineconflict(grid, a, line, self.goalcol, self.goalrow)
+        for b, line in enumerate(self.colcells):
+            counter += self.lineconflict(grid, b, line, self.goalrow, self.goalcol)
+        return counter
+
+    def hpdb(self, grid):
+        """Finds the additive Pattern Database heuristic value for a given grid.
+        
+        Keyword arguments:
+        grid -- the packed grid to find the Pattern Database heuristic value for.
+        """
+        counter = 0
+        for pattern, table in zip(self.patterns, self.pdbs):
+            counter += table[rankpositions([grid.index(tile) for tile in pattern], len(grid))]
+        return counter
+
+    def lineconflict(self, grid, here, line, goal, goalline, frompos=None, topos=None, tile=0):
+        """Finds the extra moves needed for the tiles in one row or column that are in their goal line
+        but in the wrong order. Each tile that has to leave the line to let the others pass costs 2 moves.
+        
+        Keyword arguments:
+        grid -- the packed grid.
+        here -- the index of the row or column.
+        line -- the positions making up the row or column.
+        goal -- the goal index of each tile along the line.
+        goalline -- the goal line of each tile.
+        frompos, topos, tile -- if given, the line is read as if tile had moved from frompos to topos.
+        """
+        sequence = []
+        for pos in line:
+            if pos == frompos:
+                continue # The tile has left this position
+            t = tile if pos == topos else grid[pos]
+            if t != 0 and goalline[t] == here:
+                sequence.append(goal[t])
+        return 2 * (len(sequence) - longestincreasing(sequence))
+
+class RelabelledEngine:
+    def __init__(self, engine, start):
+        """Class Initialiser. Estimates the distance to start with an engine built for another target, so bidirectional
+        search can reuse the target's tables rather than building a set for every start.
+        The start's gap is slid to where the target's gap is (shift moves), then the tiles are relabelled so that grid
+        becomes the target. Relabelling keeps distances and the slide changes them by at most shift, so the engine's
+        estimate less shift is still admissible (though it can be negative).
+        
+        Keyword arguments:
+        engine -- the HeuristicEngine built for the target.
+        start -- the packed grid to estimate the distance to.
+        """
+        self.engine = engine
+        self.rows = engine.rows
+        self.cols = engine.cols
+        moved, blank, goal = start, start.index(0), engine.target.index(0)
+        self.shift = 0
+        while blank != goal: # Rows first, then columns
+            a, b = divmod(blank, self.cols)
+            c, d = divmod(goal, self.cols)
+            pos = blank + (self.cols if c > a else -self.cols if c < a else 1 if d > b else -1)
+            moved, blank = swaptiles(moved, blank, pos), pos
+            self.shift += 1
+        table = bytearray(range(256))
+        for pos, tile in enumerate(moved):
+            table[tile] = engine.target[pos]
+        self.table = bytes(table) # For bytes.translate
+        
+    def evaluate(self, grid):
+        """Finds the h value for a given grid from scratch.
+        
+        Keyword arguments:
+        grid -- the packed grid to find the h value for.
+        """
+        return self.engine.evaluate(grid.translate(self.table)) - self.shift
 
-    return counter
+    def childh(self, parenth, grid, frompos, topos):
+        """Finds the h value of a child from its parent's h value and the single tile that moved (see HeuristicEngine.childh).
+        
+        Keyword arguments:
+        parenth -- the h value of the parent grid.
+        grid -- the packed parent grid (before the move).
+        frompos -- the position of the tile that slides into the gap.
+        topos -- the position of the gap in the parent grid.
+        """
+        return self.engine.childh(parenth + self.shift, grid.translate(self.table), frompos, topos) - self.shift
 
 def usersetgrid(cols, rows):
     """Lets the user create a grid.
@@ -158,29 +607,57 @@ def usersetgrid(cols, rows):
     return usergrid # Returns list to be put into grid
 
 
-def getgriddiction(grid, rows, cols):
-    """Creates a dictionary showing the position of each key value in a grid.
+### SOLVABILITY ###
+
+def countinversions(sequence):
+    """Counts the pairs of numbers in a sequence that are out of order, in O(n log n) with a Fenwick tree.
         
     Keyword arguments:
-    grid -- the grid.
+    sequence -- a list of distinct numbers from 0 to len(sequence)-1.
+    """
+    tree = [0] * (len(sequence) + 1) # Fenwick tree counting the numbers seen so far
+    inversions = 0
+    for seen, value in enumerate(sequence):
+        i = value + 1
+        smaller = 0
+        while i > 0: # Numbers seen so far that are smaller than value
+            smaller += tree[i]
+            i -= i & -i
+        inversions += seen - smaller # Numbers seen so far that are bigger than value
+        i = value + 1
+        while i < len(tree):
+            tree[i] += 1
+            i += i & -i
+    return inversions
+
+def issolvable(start, target, rows, cols):
+    """Finds whether the target can be reached from the start, for any number of rows and columns.
+    The tiles of the start are numbered by their order in the target and the inversions counted.
+    Sliding a tile sideways never changes the inversions, and sliding it up or down moves it past cols-1 others.
+    So with an odd number of columns the inversions must be even, and with an even number of columns the
+    inversions plus the number of rows between the two gaps must be even.
+    Returns the boolean and the number of inversions.
+        
+    Keyword arguments:
+    start -- the packed starting grid.
+    target -- the packed target grid.
     rows -- the number of rows.
     cols -- the number of columns.
     """
-
-    tilepositions = {}
-    for i in range(rows*cols):
-        rowcount = 0
-        for row in grid:
-            if i in row:
-                ipos = row.index(i)
-                tilepositions[i] = rowcount * 3 +ipos
-            rowcount += 1
-
-    return tilepositions
-
+    order = [0] * len(target) # Position of each tile in the target, not counting the gap
+    for i, tile in enumerate(tile for tile in target if tile != 0):
+        order[tile] = i
+    sequence = [order[tile] for tile in start if tile != 0]
+    if rows == 1 or cols == 1:
+        return sequence == sorted(sequence), 0 # Tiles in a single line can never pass each other
+    inversions = countinversions(sequence)
+    if cols % 2 == 1:
+        return inversions % 2 == 0, inversions
+    blankrows = abs(start.index(0) // cols - target.index(0) // cols)
+    return (inversions + blankrows) % 2 == 0, inversions
 
 def calculatepossible(startgrid, targetgrid, rows, cols, debug):
-    """Gets the position of each value in a grid.
+    """Finds whether the target grid can be reached from the starting grid (see issolvable).
         
     Keyword arguments:
     startgrid -- the starting grid.
@@ -189,82 +666,522 @@ def calculatepossible(startgrid, targetgrid, rows, cols, debug):
     cols -- the number of columns.
     debug -- boolean for DEBUG mode.
     """
-
-    startgpos = getgriddiction(startgrid, rows, cols) # Generates starting position dictionary
-    targetgpos = getgriddiction(targetgrid, rows, cols) # Generates target position dictionary
-    collisions = 0 # Number of inversions
-    position = 0  # Pointer of current position
-
-    for a in range(rows):
-        for b in range(cols):
-            currenttile = startgrid[a][b] # Works through starting grid getting the tile at each position.
-            if currenttile != 0:
-                #print("Current Tile: " + str(currenttile))
-                for c in range(rows):
-                    for d in range(cols):
-                        checktile = startgrid[c][d] #  Gets tile to check against
-                        if checktile != 0:
-                            #print("Check Tile: " + str(checktile) + " Position: " + str(position) + " CTpos: " + str(startgpos[checktile]) + " TGpos: " + str(targetgpos[checktile]))
-                            if startgpos[checktile] > position: # If the check tile is behind current tile
-                                #print(str(checktile) + " compared with " + str(targetgpos[currenttile]))
-                                if checktile < targetgpos[currenttile]: 
-                                    collisions += 1 # If inversion +1 to number of inversions
-            position += 1
+    possible, collisions = issolvable(packgrid(startgrid), packgrid(targetgrid), rows, cols)
     
     if debug:
         print("Number of inversions: " + str(collisions))
     
-    if collisions % 2 == 0:
-        return True # If even, return True
+    return possible
+
+
+
+### INSTANCE GENERATION ###
+
+def shufflegrid(target, rows, cols, generator):
+    """Returns a uniformly random grid that can reach the target. The tiles are shuffled once, and if the
+    shuffle can't reach the target two tiles are swapped, which fixes it on any board of at least 2 rows and
+    2 columns (see issolvable). On a single line the tiles keep the target's order and only the gap is placed at random.
+        
+    Keyword arguments:
+    target -- the packed target grid.
+    rows -- the number of rows.
+    cols -- the number of columns.
+    generator -- the random.Random to draw from.
+    """
+    if rows == 1 or cols == 1: # Tiles in a single line can never pass each other
+        tiles = [tile for tile in target if tile != 0]
+        tiles.insert(generator.randrange(len(target)), 0)
+        return bytes(tiles)
+    tiles = bytearray(target)
+    generator.shuffle(tiles)
+    if not issolvable(bytes(tiles), target, rows, cols)[0]:
+        first, second = [pos for pos, tile in enumerate(tiles) if tile != 0][:2]
+        tiles[first], tiles[second] = tiles[second], tiles[first]
+    return bytes(tiles)
+
+def walkgrid(target, rows, cols, length, generator):
+    """Returns the grid reached by sliding random tiles length times from the target, never undoing the last move
+    unless it is the only one (at the ends of a single line).
+    The grid is at most length moves from the target (and can always reach it).
+        
+    Keyword arguments:
+    target -- the packed target grid.
+    rows -- the number of rows.
+    cols -- the number of columns.
+    length -- the number of moves.
+    generator -- the random.Random to draw from.
+    """
+    neighbours = neighbourtable(rows, cols)
+    grid = bytearray(target)
+    blank, previous = target.index(0), None
+    for _ in range(length):
+        choices = [pos for pos in neighbours[blank] if pos != previous] or neighbours[blank]
+        pos = choices[generator.randrange(len(choices))]
+        grid[blank], grid[pos] = grid[pos], 0
+        blank, previous = pos, blank
+    return bytes(grid)
+
+def generateinstances(count, target, rows, cols, generator, length=None, depth=None):
+    """Yields count random grids that can reach the target, one at a time.
+    By default they are uniformly random (shufflegrid). With length they are random walks of that many moves
+    back from the target (walkgrid). With depth they are drawn uniformly from every grid exactly depth moves
+    from the target, found in the exact distance table (so only for boards of up to 9 positions).
+        
+    Keyword arguments:
+    count -- the number of grids.
+    target -- the packed target grid.
+    rows -- the number of rows.
+    cols -- the number of columns.
+    generator -- the random.Random to draw from (seed it to get the same grids again).
+    length -- the number of random moves back from the target (optional).
+    depth -- the exact number of moves from the target (optional).
+    """
+    if depth is not None:
+        table = loaddistancetable(target, rows, cols)
+        ranks = [match.start() for match in re.finditer(re.escape(bytes([depth])), table)] # Every grid at that depth
+        if depth == 255 or not ranks:
+            raise ValueError("no grid is " + str(depth) + " moves from the target")
+        for _ in range(count):
+            yield unrankpositions(ranks[generator.randrange(len(ranks))], rows*cols)
+    elif length is not None:
+        for _ in range(count):
+            yield walkgrid(target, rows, cols, length, generator)
     else:
-        return False # If odd, return False
+        for _ in range(count):
+            yield shufflegrid(target, rows, cols, generator)
 
+def rungenerate(arguments):
+    """Runs the command line generator, writing one grid per line in the format --batch reads.
+        
+    Keyword arguments:
+    arguments -- the parsed command line arguments.
+    """
+    rows, cols = arguments.rows, arguments.cols
+    if arguments.target is not None:
+        target = tilesof([int(tile) for tile in arguments.target.replace(",", " ").split()], rows, cols)
+    else:
+        target = bytes(range(rows*cols)) # 0 first, like the default target grid
+    generator = random.Random(arguments.seed)
+    outfile = sys.stdout if arguments.output is None else open(arguments.output, "w")
+    try:
+        for start in generateinstances(arguments.generate, target, rows, cols, generator, arguments.walk, arguments.depth):
+            outfile.write(" ".join(map(str, start)) + "\n") # Streamed out, so any number of grids can be made
+    finally:
+        if outfile is not sys.stdout:
+            outfile.close()
 
+def swaptiles(puzzlegrid, blank, tile):
+    """Returns a copy of a packed grid with the gap and a tile swapped.
+        
+    Keyword arguments:
+    puzzlegrid -- the packed grid.
+    blank -- the position of the 0.
+    tile -- the position of the tile to slide into the gap.
+    """
+    movegrid = bytearray(puzzlegrid)
+    movegrid[blank] = puzzlegrid[tile]
+    movegrid[tile] = 0
+    return bytes(movegrid)
 
-def possiblemoves(puzzlegrid):
-    """Finds the possible moves from a given grid.
+def possiblemoves(puzzlegrid, rows, cols, blank=None):
+    """Finds the possible moves from a given grid, for any number of rows and columns.
+        
+    Returns a list of (child grid, position of the tile that moved, position of the 0) tuples.
+    The position of the tile that moved is where the 0 is in the child grid.
         
     Keyword arguments:
-    puzzlegrid -- the grid to find the children nodes of.
+    puzzlegrid -- the packed grid to find the children nodes of.
+    rows -- the number of rows.
+    cols -- the number of columns.
+    blank -- the position of the 0 (found from the grid if not given).
     """
-    moves = [] # List of possible children from current grid
-    # Creates 4 deepcopies of the current grid (doesn't work with shallow copies)
-    movegrid1 = copy.deepcopy(puzzlegrid)
-    movegrid2 = copy.deepcopy(puzzlegrid)
-    movegrid3 = copy.deepcopy(puzzlegrid)
-    movegrid4 = copy.deepcopy(puzzlegrid)
-    
-    for i in range(cols):
-        for j in range(rows):
-            if puzzlegrid[i][j] == 0:
-                a, b = i,j # Find position of the 0
-
-
-    if a != 0: # If a is not minimum
-        movegrid1[a][b] = puzzlegrid[a-1][b]
-        movegrid1[a-1][b] = 0
-        # Swap with tile to the left
-        moves.append(movegrid1.copy())
-        
-    if a != (rows-1): # If a is not maximum
-        movegrid2[a][b] = puzzlegrid[a+1][b]
-        movegrid2[a+1][b] = 0
-        # Swap with tile to the right
-        moves.append(movegrid2.copy())
-        
-    if b != 0: # If b is not minimum
-        movegrid3[a][b] = puzzlegrid[a][b-1]
-        movegrid3[a][b-1] = 0
-        # Swap with tile above
-        moves.append(movegrid3.copy())
-        
-    if b != (rows-1): # If b is not maximum
-        movegrid4[a][b] = puzzlegrid[a][b+1]
-        movegrid4[a][b+1] = 0
-        # Swap with tile below
-        moves.append(movegrid4.copy())
-        
-    return moves # Return children list
+    if blank is None:
+        blank = puzzlegrid.index(0) # Find position of the 0
+    return [(swaptiles(puzzlegrid, blank, pos), pos, blank) for pos in neighbourtable(rows, cols)[blank]] # Above, below, left then right
+
+class SearchStats:
+    def __init__(self, interval=0, report=None):
+        """Class Initialiser. Counts what a search does, for comparing heuristics and search methods.
+        
+        Keyword arguments:
+        interval -- the number of nodes expanded between progress records (0 for none).
+        report -- the function each progress record (a dictionary) is passed to (writes a JSON line to stderr if not given).
+        """
+        self.generated = 0 # Child nodes generated
+        self.expanded = 0 # Nodes expanded
+        self.duplicates = 0 # Children dropped as already closed or already queued with a smaller g
+        self.peakopen = 0 # Largest open list (or path length, for IDA*)
+        self.peakclosed = 0 # Largest closed list
+        self.depth = None # Number of moves in the solution
+        self.interval = interval
+        self.nextreport = interval if interval > 0 else -1 # Expanded count at which the next progress record is due
+        self.report = report
+        self.t0 = time.perf_counter()
+        self.timetaken = 0
+
+    def progress(self, opensize, closedsize):
+        """Records the list sizes and emits a progress record (called every interval nodes expanded).
+        
+        Keyword arguments:
+        opensize -- the current size of the open list.
+        closedsize -- the current size of the closed list.
+        """
+        self.peakclosed = max(self.peakclosed, closedsize)
+        self.nextreport += self.interval
+        record = self.summary()
+        record["open"] = opensize
+        record["closed"] = closedsize
+        if self.report is not None:
+            self.report(record)
+        else:
+            sys.stderr.write(json.dumps(record) + "\n")
+
+    def finish(self, solution, closedsize):
+        """Records the end of the search.
+        
+        Keyword arguments:
+        solution -- the list of packed grids found (None if there is no solution).
+        closedsize -- the final size of the closed list.
+        """
+        self.peakclosed = max(self.peakclosed, closedsize)
+        self.depth = len(solution) - 1 if solution is not None else None
+        self.timetaken = time.perf_counter() - self.t0
+
+    def branching(self):
+        """Finds the effective branching factor b, where a uniform tree of the solution's depth with branching b
+        would have as many nodes as were generated (None before a solution is found)."""
+        if not self.depth or self.generated == 0:
+            return None
+        # b^depth alone can't pass generated, so neither can any term of the sum (no float overflow however deep)
+        low, high = 1.0, max(float(self.generated) ** (1 / self.depth), 1.0)
+        for _ in range(60): # Bisection on b + b^2 + ... + b^depth = generated
+            b = (low + high) / 2
+            total = sum(b**i for i in range(1, self.depth + 1))
+            if total < self.generated:
+                low = b
+            else:
+                high = b
+        return round((low + high) / 2, 4)
+
+    def summary(self):
+        """Returns the counters as a dictionary that can be written out as JSON."""
+        timetaken = self.timetaken or time.perf_counter() - self.t0
+        return {"generated": self.generated, "expanded": self.expanded, "duplicates": self.duplicates,
+                "peakopen": self.peakopen, "peakclosed": self.peakclosed, "depth": self.depth,
+                "branching": self.branching(), "time": timetaken,
+                "nodespersecond": self.expanded / timetaken if timetaken > 0 else None}
+
+class OpenList:
+    def __init__(self):
+        """Class Initialiser. An open list kept as a binary heap.
+        Ties on f go to the lower h (so the higher g), then to whichever was added first.
+        Grids already queued with a g at least as small are not added again, and entries
+        superseded by a smaller g are skipped when they reach the top.
+        """
+        self.heap = [] # (f, h, insertion counter, g, grid, item) entries
+        self.bestg = {} # Smallest g each grid has been queued with
+        self.counter = 0 # Insertion counter (also stops items ever being compared)
+
+    def __len__(self):
+        """Number of entries in the heap, including stale ones not yet skipped."""
+        return len(self.heap)
+
+    def push(self, f, h, g, grid, item):
+        """Adds an entry unless the grid is already queued with a g at least as small.
+        Returns True if the entry was added.
+        
+        Keyword arguments:
+        f -- the f value.
+        h -- the h value.
+        g -- the g value.
+        grid -- the packed grid.
+        item -- the item returned by pop.
+        """
+        if self.bestg.get(grid, g + 1) <= g:
+            return False # Dominated duplicate
+        self.bestg[grid] = g
+        heappush(self.heap, (f, h, self.counter, g, grid, item))
+        self.counter += 1
+        return True
+
+    def skipstale(self):
+        """Drops entries from the top of the heap that have been superseded by a smaller g."""
+        heap, bestg = self.heap, self.bestg
+        while heap and heap[0][3] != bestg[heap[0][4]]:
+            heappop(heap)
+
+    def pop(self):
+        """Removes and returns the item with the smallest f (None if the open list is empty)."""
+        self.skipstale()
+        if not self.heap:
+            return None
+        return heappop(self.heap)[5]
+
+    def minf(self):
+        """Returns the smallest f in the open list (infinity if it is empty)."""
+        self.skipstale()
+        return self.heap[0][0] if self.heap else float("inf")
+
+class NodeStore:
+    def __init__(self, size):
+        """Class Initialiser. Holds search nodes in flat typed arrays rather than one object each, so a node
+        costs its packed grid plus a few bytes. Nodes are referred to by index, in the order they were added.
+        
+        Keyword arguments:
+        size -- the number of positions in the grid.
+        """
+        self.size = size
+        self.grids = bytearray() # Packed grid of every node, one after another
+        self.g = array("i") # g value of each node
+        self.h = array("H") # h value of each node
+        self.blank = array("H") # Position of the 0 in each node's grid
+        self.parent = array("i") # Index of each node's parent (-1 for the start)
+
+    def __len__(self):
+        """Number of nodes stored."""
+        return len(self.g)
+
+    def add(self, grid, g, h, blank, parent):
+        """Stores a node and returns its index.
+        
+        Keyword arguments:
+        grid -- the packed grid.
+        g -- the g value.
+        h -- the h value.
+        blank -- the position of the 0 in grid.
+        parent -- the index of the parent node (-1 for none).
+        """
+        self.grids += grid
+        self.g.append(g)
+        self.h.append(h)
+        self.blank.append(blank)
+        self.parent.append(parent)
+        return len(self.g) - 1
+
+    def grid(self, index):
+        """Returns the packed grid of a node.
+        
+        Keyword arguments:
+        index -- the node's index.
+        """
+        return bytes(self.grids[index*self.size:(index+1)*self.size])
+
+    def path(self, index):
+        """Returns the packed grids from the start to a node, following parent indices back.
+        
+        Keyword arguments:
+        index -- the node's index.
+        """
+        path = []
+        while index != -1:
+            path.append(self.grid(index))
+            index = self.parent[index]
+        path.reverse() # Reverse path so it is order of traversal
+        return path
+
+def astar(start, target, engine, stats=None):
+    """Solves the puzzle with A* search.
+    Returns the list of packed grids from start to target (None if there is no solution) and the number of nodes expanded.
+        
+    Keyword arguments:
+    start -- the packed starting grid.
+    target -- the packed target grid.
+    engine -- the HeuristicEngine for the target.
+    stats -- the SearchStats to count into (optional).
+    """
+    if stats is None:
+        stats = SearchStats()
+    routes = OpenList() # Open list of node indices (its best g map also covers the closed grids)
+    routes.bestg[start] = 0
+    nodes = NodeStore(len(start)) # Every node generated
+    closed = 1 # Number of nodes expanded or being expanded
+    node = nodes.add(start, 0, engine.evaluate(start), start.index(0), -1) # Start node
+    grid = start
+    while grid != target: # While solution not found.
+        stats.expanded += 1
+        distance = nodes.g[node] + 1 # Number of moves to the children
+        h = nodes.h[node]
+        for move, frompos, topos in possiblemoves(grid, engine.rows, engine.cols, nodes.blank[node]): # For each move
+            stats.generated += 1
+            # Check if node has already been reached (queued or closed) with a g at least as small.
+            # A closed grid reached more cheaply is opened again, which keeps the solution optimal when the
+            # heuristic is admissible but not consistent (as pattern databases can be on some boards).
+            if routes.bestg.get(move, distance + 1) > distance:
+                routeh = engine.childh(h, grid, frompos, topos) # h from the parent's h and the moved tile
+                child = nodes.add(move, distance, routeh, frompos, node) # The tile's old position is the new gap
+                routes.push(distance + routeh, routeh, distance, move, child) # If not, add to open list.
+            else:
+                stats.duplicates += 1
+        if len(routes) > stats.peakopen:
+            stats.peakopen = len(routes)
+        if stats.expanded == stats.nextreport:
+            stats.progress(len(routes), closed)
+        node = routes.pop() # Returns the index of the next node.
+        if node is None:
+            stats.finish(None, closed)
+            return None, stats.expanded # If there are no more possible moves, then finding a solution is impossible.
+        grid = nodes.grid(node)
+        closed += 1
+
+    solution = nodes.path(node) # Follow parent indices back to the start.
+    stats.finish(solution, closed)
+    return solution, stats.expanded
+
+def idastar(start, target, engine, stats=None):
+    """Solves the puzzle with Iterative Deepening A*, which only keeps the current path in memory.
+    Moves are applied to and undone from a single grid, and a move is never followed by its reverse.
+    Returns the list of packed grids from start to target (None if there is no solution) and the number of nodes expanded.
+        
+    Keyword arguments:
+    start -- the packed starting grid.
+    target -- the packed target grid.
+    engine -- the HeuristicEngine for the target.
+    stats -- the SearchStats to count into (optional).
+    """
+    if stats is None:
+        stats = SearchStats()
+    grid = bytearray(start) # The grid moves are made on
+    neighbours = neighbourtable(engine.rows, engine.cols)
+    path = [] # Positions of the tile moved at each step
+
+    def search(blank, previous, g, h, bound):
+        """Depth first search below the current node, cut off where f goes over bound.
+        Returns True if the target was found, otherwise the smallest f that went over bound."""
+        if g + h > bound:
+            return g + h
+        if grid == target:
+            return True
+        stats.expanded += 1
+        if g > stats.peakopen:
+            stats.peakopen = g
+        if stats.expanded == stats.nextreport:
+            stats.progress(g, 0)
+        minimum = float("inf")
+        for pos in neighbours[blank]:
+            if pos == previous:
+                continue # Would just undo the last move
+            stats.generated += 1
+            childh = engine.childh(h, grid, pos, blank)
+            grid[blank] = grid[pos] # Apply the move
+            grid[pos] = 0
+            path.append(pos)
+            result = search(pos, blank, g + 1, childh, bound)
+            if result is True:
+                return True
+            path.pop()
+            grid[pos] = grid[blank] # Undo the move
+            grid[blank] = 0
+            if result < minimum:
+                minimum = result
+        return minimum
+
+    blank = start.index(0)
+    h = engine.evaluate(start)
+    bound = h
+    while True:
+        result = search(blank, None, 0, h, bound)
+        if result is True:
+            break
+        if result == float("inf"):
+            stats.finish(None, 0)
+            return None, stats.expanded # Nothing left to search
+        bound = result # Next iteration goes as far as the smallest f that was cut off
+
+    solution = [start]
+    grid = bytearray(start)
+    for pos in path:
+        grid[blank] = grid[pos]
+        grid[pos] = 0
+        blank = pos
+        solution.append(bytes(grid))
+    stats.finish(solution, 0)
+    return solution, stats.expanded
+
+def bidirectional(start, target, forwardengine, backwardengine, stats=None):
+    """Solves the puzzle with front-to-end bidirectional A*, searching forward from start and backward from target.
+    Stops once the best path found through a meeting point is no longer than the larger of the two smallest f values
+    still open, which keeps the answer optimal when the heuristics are admissible.
+    Returns the list of packed grids from start to target (None if there is no solution) and the number of nodes expanded.
+        
+    Keyword arguments:
+    start -- the packed starting grid.
+    target -- the packed target grid.
+    forwardengine -- the HeuristicEngine estimating the distance to target.
+    backwardengine -- the HeuristicEngine (or RelabelledEngine) estimating the distance to start.
+    stats -- the SearchStats to count into (optional).
+    """
+    if stats is None:
+        stats = SearchStats()
+    if start == target:
+        stats.finish([start], 0)
+        return [start], 0
+    # Each direction has an open list (whose best g map holds the g values), parents and an engine
+    forward = (OpenList(), {start: None}, forwardengine)
+    backward = (OpenList(), {target: None}, backwardengine)
+    h = forwardengine.evaluate(start)
+    forward[0].push(h, h, 0, start, (start, h, start.index(0)))
+    h = backwardengine.evaluate(target)
+    backward[0].push(h, h, 0, target, (target, h, target.index(0)))
+    best = float("inf") # Length of the shortest path found so far
+    meet = None # Grid where the two searches meet on that path
+
+    while best > max(forward[0].minf(), backward[0].minf()): # Until no open node can lead to a shorter path
+        # Expand from the side with the smaller open list
+        if len(forward[0]) <= len(backward[0]):
+            routes, parents, engine = forward
+            othergvalues = backward[0].bestg
+        else:
+            routes, parents, engine = backward
+            othergvalues = forward[0].bestg
+        grid, h, blank = routes.pop()
+        g = routes.bestg[grid] + 1 # Popped entries always hold the best g
+        stats.expanded += 1
+        for move, frompos, topos in possiblemoves(grid, engine.rows, engine.cols, blank):
+            stats.generated += 1
+            if routes.bestg.get(move, g + 1) <= g:
+                stats.duplicates += 1
+                continue # Already reached at least as cheaply
+            moveh = engine.childh(h, grid, frompos, topos)
+            routes.push(g + moveh, moveh, g, move, (move, moveh, frompos))
+            parents[move] = grid
+            if move in othergvalues and g + othergvalues[move] < best:
+                best = g + othergvalues[move] # The two searches meet here
+                meet = move
+        opensize = len(forward[0]) + len(backward[0])
+        if opensize > stats.peakopen:
+            stats.peakopen = opensize
+        if stats.expanded == stats.nextreport:
+            stats.progress(opensize, stats.expanded)
+
+    if meet is None:
+        stats.finish(None, stats.expanded)
+        return None, stats.expanded
+    # Stitch the forward chain (start to meet) onto the backward chain (meet to target)
+    solution = []
+    node = meet
+    while node is not None:
+        solution.append(node)
+        node = forward[1][node]
+    solution.reverse()
+    node = backward[1][meet]
+    while node is not None:
+        solution.append(node)
+        node = backward[1][node]
+    stats.finish(solution, stats.expanded) # Every node expanded is closed
+    return solution, stats.expanded
+
+def printsolution(solution, cols):
+    """Prints each step of a solution.
+        
+    Keyword arguments:
+    solution -- the list of packed grids from the starting grid to the target grid.
+    cols -- the number of columns.
+    """
+    i = 0
+    for grid in solution:
+        print(str(i) + ")")
+        printgrid(unpackgrid(grid, cols)) # Print steps
+        i += 1
 
 def printcurrentinfo(startgrid, targetgrid, h):
     """Prints the current starting grid, target grid, and heuristic.
@@ -284,12 +1201,8 @@ def printcurrentinfo(startgrid, targetgrid, h):
     # Displays Heuristic
     print("Heuristic: ")
     print()
-    if h == 0:
-        print("Misplaced Squares") 
-    elif h == 1:
-        print("Manhattan Distance")
-    elif h == 2:
-        print("Double Misplaced Squares (Not Admissable)")
+    if h in range(0, len(heuristicnames)):
+        print(heuristicnames[h])
     else:
         print("NO HEURISTIC!")
     print()
@@ -316,155 +1229,384 @@ def customise(cols, rows, debug, startgrid, targetgrid, h):
         print("2. Change Heuristic.")
         print("3. Enter a Start Grid.")
         print("4. Enter a Target Grid.")
-        print("5. Randomly Generate a 3x3 Start Grid")
-        print("6. Change Grid Dimensions. (EXPERIMENTAL - MAY NOT WORK)")
+        print("5. Randomly Generate a Start Grid")
+        print("6. Change Grid Dimensions.")
         print("7. Back")
         userchoice = input() #User makes choice
         if userchoice == '1':
             debug = True # Enables DEBUG mode. (for testing)
-            print("DEBUG mode enabled, will print current node information when program is run from the main menu.")
+            print("DEBUG mode enabled, will print search statistics when program is run from the main menu.")
             print()
             input("To return to the customisation menu, please press enter...")
             
         elif userchoice == '2':
-            h = inputh()
+            h = inputh(rows*cols)
             print()
             input("To return to the customisation menu, please press enter...")
 
         elif userchoice == '3':
             print('Current start grid:')
             printgrid(startgrid) # Prints current starting grid
-            startgrid = setupgrid(usersetgrid(cols, rows)) # Sets up grid using setupgrid() and usersetgrid()
+            startgrid = setupgrid(usersetgrid(cols, rows), rows, cols) # Sets up grid using setupgrid() and usersetgrid()
                 
         elif userchoice == '4':
             print('Current target grid:')
             printgrid(targetgrid) # Prints current target grid
-            targetgrid = setupgrid(usersetgrid(cols, rows)) # Sets up grid using setupgrid() and usersetgrid()
+            targetgrid = setupgrid(usersetgrid(cols, rows), rows, cols) # Sets up grid using setupgrid() and usersetgrid()
             
         elif userchoice == '5':
-            orderedlist = [0,1,2,3,4,5,6,7,8]
-            possiblegrid = False
-            while possiblegrid == False:
-                random.shuffle(orderedlist)
-                startgrid = setupgrid(orderedlist) # Randomly generates a starting grid
-                possiblegrid = calculatepossible(startgrid, targetgrid, rows, cols, False) 
+            moves = input("Enter a number of random moves back from the target (or press enter for a fully random grid): ")
+            length = int(moves) if moves.strip().isdigit() else None
+            start = next(generateinstances(1, packgrid(targetgrid), rows, cols, random.Random(), length)) # Always reaches the target
+            startgrid = unpackgrid(start, cols)
             print("New Start Grid: ")
             printgrid(startgrid) # Print new starting grid
             print()
             input("To return to the customisation menu, please press enter...")
         
         elif userchoice == '6':
-            size = int(input("Enter grid size: ")) # choose size of grid
-
-            cols, rows = (size, size) # Sets grid to square (just for simplicity)
+            rows = int(input("Enter number of rows: ")) # choose size of grid
+            cols = int(input("Enter number of columns: ")) # Any rows x cols board, e.g. 2 x 4, 3 x 4 or 4 x 5
             print("Set up starting grid:")
-            startgrid = setupgrid(usersetgrid(cols, rows)) # Sets up grid using setupgrid() and usersetgrid()
+            startgrid = setupgrid(usersetgrid(cols, rows), rows, cols) # Sets up grid using setupgrid() and usersetgrid()
             print("Set up target grid:")
-            targetgrid = setupgrid(usersetgrid(cols, rows)) # Sets up grid using setupgrid() and usersetgrid()
+            targetgrid = setupgrid(usersetgrid(cols, rows), rows, cols) # Sets up grid using setupgrid() and usersetgrid()
         
         elif userchoice == '7':
             donecustomising = True # Lets user leave this menu
     
     return cols, rows, debug, startgrid, targetgrid, h #returns the values that may have been customised
             
-rows, cols = (3,3) # Rows and Columns (by default 3 x 3)
-debug = False # If DEBUG mode is set to True, the program will print information about each node.
-quitter = False # Set to False whilst user doesn't want to quit
-clearConsole()
-
-print("Welcome to the 8 Tile Puzzle A* Search.")
-print()
-print("Before we begin...")
-general = input("Would you like to choose the start and target grids? Enter '1' if so (any other input will result in using the example grid). ")
-if general == '1':
-    print("Enter start grid: ")
-    startgrid = setupgrid(usersetgrid(cols, rows)) # Sets up grid using setupgrid() and usersetgrid()
-    print("Enter target grid: ")
-    targetgrid = setupgrid(usersetgrid(cols, rows)) # Sets up grid using setupgrid() and usersetgrid()
-else:
-    startgrid = setupgrid([7,2,4,5,0,6,8,3,1]) # Default starting grid (set to example from specification)
-    targetgrid = setupgrid([0,1,2,3,4,5,6,7,8]) # Default target grid (how the puzzle normally works)
-h = inputh()
-printcurrentinfo(startgrid, targetgrid, h)
-
-# MAIN MENU SECTION
-while quitter == False:
-    routes = PriorityQueue() # Open list
-    donemoves = [] # Closed list
-    moves = [] # List of children nodes from the node
-    distance = 0 # Number of moves to the point
-    clearConsole()
-    if (rows, cols) == (3,3):
-        ispossible = calculatepossible(startgrid, targetgrid, rows, cols, debug)
+### NON-INTERACTIVE API ###
+
+searchmethods = ["astar", "idastar", "bidirectional", "table"]
+
+enginecache = {} # HeuristicEngines already built, keyed on (target, rows, cols, heuristic)
+
+def getengine(target, rows, cols, choice):
+    """Returns the HeuristicEngine for a target, building it only the first time it is asked for.
+        
+    Keyword arguments:
+    target -- the packed target grid.
+    rows -- the number of rows.
+    cols -- the number of columns.
+    choice -- the heuristic choice (see heuristicnames).
+    """
+    key = (target, rows, cols, choice)
+    if key not in enginecache:
+        enginecache[key] = HeuristicEngine(target, rows, cols, choice)
+    return enginecache[key]
+
+def tilesof(grid, rows, cols):
+    """Packs a grid given as a flat list, a list of rows or a packed grid, checking it holds each tile once.
+        
+    Keyword arguments:
+    grid -- the grid.
+    rows -- the number of rows.
+    cols -- the number of columns.
+    """
+    if len(grid) != 0 and isinstance(grid[0], list):
+        packed = packgrid(grid)
     else:
-        ispossible = True
+        packed = bytes(grid)
+    if sorted(packed) != list(range(rows*cols)):
+        raise ValueError("grid must hold each of the numbers 0 to " + str(rows*cols-1) + " exactly once")
+    return packed
+
+class Result:
+    def __init__(self, start, target, rows, cols, heuristic, method, possible, solution, stats, timetaken):
+        """Class Initialiser.
+        
+        Keyword arguments:
+        start -- the packed starting grid.
+        target -- the packed target grid.
+        rows -- the number of rows.
+        cols -- the number of columns.
+        heuristic -- the heuristic choice used.
+        method -- the search method used (see searchmethods).
+        possible -- boolean for whether the target can be reached at all.
+        solution -- the list of packed grids from start to target (None if not solved).
+        stats -- the SearchStats counted during the search.
+        timetaken -- the time taken in seconds.
+        """
+        self.start = start
+        self.target = target
+        self.rows = rows
+        self.cols = cols
+        self.heuristic = heuristic
+        self.method = method
+        self.possible = possible
+        self.solution = solution
+        self.solved = solution is not None
+        self.moves = len(solution) - 1 if solution is not None else None # Number of moves in the solution
+        self.stats = stats
+        self.expanded = stats.expanded # Number of nodes expanded
+        self.timetaken = timetaken
+
+    def tilesmoved(self):
+        """Lists the tile slid into the gap at each step of the solution."""
+        return [after[before.index(0)] for before, after in zip(self.solution, self.solution[1:])]
+
+    def todict(self):
+        """Returns the result as a dictionary that can be written out as JSON."""
+        return {"start": list(self.start), "target": list(self.target), "rows": self.rows, "cols": self.cols,
+                "heuristic": self.heuristic, "method": self.method, "possible": self.possible,
+                "solved": self.solved, "moves": self.moves,
+                "tilesmoved": self.tilesmoved() if self.solved else None,
+                "expanded": self.expanded, "time": self.timetaken, "stats": self.stats.summary()}
+
+def solve(start, target, heuristic=1, rows=3, cols=3, method="astar", stats=None):
+    """Solves one puzzle without any user interaction and returns a Result.
+        
+    Keyword arguments:
+    start -- the starting grid (flat list, list of rows or packed grid).
+    target -- the target grid (flat list, list of rows or packed grid).
+    heuristic -- the heuristic choice (see heuristicnames).
+    rows -- the number of rows.
+    cols -- the number of columns.
+    method -- the search method (see searchmethods).
+    stats -- the SearchStats to count into, e.g. to get progress records (optional).
+    """
+    start, target = tilesof(start, rows, cols), tilesof(target, rows, cols)
+    if method not in searchmethods:
+        raise ValueError("method must be one of " + ", ".join(searchmethods))
+    if heuristic not in range(0, len(heuristicnames)):
+        raise ValueError("heuristic must be between 0 and " + str(len(heuristicnames)-1))
+    t0 = time.time() # Start timer
+    possible = issolvable(start, target, rows, cols)[0] # Checked before any search starts
+    solution = None
+    if possible and method == "table":
+        engine = getengine(target, rows, cols, 5)
+        if stats is None:
+            stats = SearchStats() # Started after the table is loaded, like the searches below
+        solution = tablesolve(start, target, engine.distances, rows, cols, stats)[0] # No search needed
+    elif possible:
+        engine = getengine(target, rows, cols, heuristic)
+        if method == "bidirectional":
+            if heuristic in (4, 5): # Reuses the target's tables, instead of building and saving a set for this start
+                backwardengine = RelabelledEngine(engine, start)
+            else:
+                backwardengine = HeuristicEngine(start, rows, cols, heuristic) # Estimates distance back to the start
+        if stats is None:
+            stats = SearchStats()
+        if method == "astar":
+            solution = astar(start, target, engine, stats)[0]
+        elif method == "idastar":
+            solution = idastar(start, target, engine, stats)[0]
+        else:
+            solution = bidirectional(start, target, engine, backwardengine, stats)[0]
+    elif stats is None:
+        stats = SearchStats()
+    t1 = time.time() # End timer
+    return Result(start, target, rows, cols, heuristic, method, possible, solution, stats, t1-t0)
+
+def readinstances(lines, rows, cols, target):
+    """Reads puzzles from lines of text, one per line, as the start tiles optionally followed by ';' and the target tiles.
+    Tiles may be separated by spaces or commas. Blank lines and lines starting with '#' are skipped.
+    Yields (line number, start, target) tuples, with the error message in place of start for lines that can't be read.
+        
+    Keyword arguments:
+    lines -- the lines of text.
+    rows -- the number of rows.
+    cols -- the number of columns.
+    target -- the packed target grid used when a line doesn't give one.
+    """
+    for number, line in enumerate(lines, 1):
+        line = line.strip()
+        if line == "" or line.startswith("#"):
+            continue
+        try:
+            parts = [tilesof([int(tile) for tile in part.replace(",", " ").split()], rows, cols) for part in line.split(";")]
+        except ValueError as error:
+            yield number, str(error), None
+            continue
+        if len(parts) > 2:
+            yield number, "expected at most one ';' between start and target", None
+        else:
+            yield number, parts[0], parts[1] if len(parts) == 2 else target
+
+def solveinstance(number, start, target, heuristic, rows, cols, method, progress=0):
+    """Solves one batch puzzle, returning its result as a dictionary (run in the worker processes).
+        
+    Keyword arguments:
+    number -- the line number the puzzle came from.
+    start -- the packed starting grid.
+    target -- the packed target grid.
+    heuristic -- the heuristic choice.
+    rows -- the number of rows.
+    cols -- the number of columns.
+    method -- the search method.
+    progress -- the number of nodes expanded between progress records written to stderr (0 for none).
+    """
+    def report(record):
+        record["line"] = number
+        sys.stderr.write(json.dumps(record) + "\n")
+    record = {"line": number}
+    record.update(solve(start, target, heuristic, rows, cols, method, SearchStats(progress, report)).todict())
+    return record
+
+def batchsolve(instances, workers, heuristic=1, rows=3, cols=3, method="astar", progress=0):
+    """Solves puzzles across a pool of processes, yielding result dictionaries in input order as they finish
+    (an error record for each puzzle that couldn't be read or solved).
+    Only a few puzzles per worker are handed out at a time, so any number of puzzles can be streamed through.
+        
+    Keyword arguments:
+    instances -- (line number, start, target) tuples, as from readinstances.
+    workers -- the number of worker processes.
+    heuristic -- the heuristic choice.
+    rows -- the number of rows.
+    cols -- the number of columns.
+    method -- the search method.
+    progress -- the number of nodes expanded between progress records written to stderr (0 for none).
+    """
+    def collect(item):
+        if isinstance(item, dict):
+            return item
+        number, future = item
+        try:
+            return future.result()
+        except Exception as error: # One bad puzzle gets an error record rather than ending the whole batch
+            return {"line": number, "error": str(error) or type(error).__name__}
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = deque() # (line number, future) pairs, or ready error records, in input order
+        for number, start, target in instances:
+            if target is None:
+                pending.append({"line": number, "error": start}) # Couldn't be read
+            else:
+                pending.append((number, pool.submit(solveinstance, number, start, target, heuristic, rows, cols, method, progress)))
+            while len(pending) > workers * 4 or (pending and isinstance(pending[0], dict)):
+                yield collect(pending.popleft())
+        while pending:
+            yield collect(pending.popleft())
+
+def runbatch(arguments):
+    """Runs the command line batch mode, writing one JSON line per puzzle.
+        
+    Keyword arguments:
+    arguments -- the parsed command line arguments.
+    """
+    rows, cols = arguments.rows, arguments.cols
+    if arguments.target is not None:
+        target = tilesof([int(tile) for tile in arguments.target.replace(",", " ").split()], rows, cols)
+    else:
+        target = bytes(range(rows*cols)) # 0 first, like the default target grid
+    if (arguments.heuristic == 5 or arguments.method == "table") and rows * cols > 9:
+        sys.exit("The exact distance table is only available for boards of up to 9 positions.")
+    # Build or load the default target's tables once here, so the workers don't all build them at the same time
+    getengine(target, rows, cols, 5 if arguments.method == "table" else arguments.heuristic)
+    infile = sys.stdin if arguments.batch == "-" else open(arguments.batch, "r")
+    outfile = sys.stdout if arguments.output is None else open(arguments.output, "w")
+    try:
+        instances = readinstances(infile, rows, cols, target)
+        for record in batchsolve(instances, arguments.workers, arguments.heuristic, rows, cols, arguments.method, arguments.progress):
+            outfile.write(json.dumps(record) + "\n")
+            outfile.flush() # Stream results out as they are ready
+    finally:
+        if infile is not sys.stdin:
+            infile.close()
+        if outfile is not sys.stdout:
+            outfile.close()
+
+def parsearguments():
+    """Reads the command line arguments (none are needed for the interactive menu)."""
+    parser = argparse.ArgumentParser(description="Sliding tile puzzle solver. Runs the interactive menu unless --batch or --generate is given.")
+    parser.add_argument("--batch", metavar="FILE", help="solve every puzzle in FILE ('-' for standard input), one per line, writing JSON lines")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="number of worker processes (default: one per CPU)")
+    parser.add_argument("--heuristic", type=int, default=1, choices=range(0, len(heuristicnames)), help="heuristic choice, as numbered in the menu (default: 1)")
+    parser.add_argument("--method", default="astar", choices=searchmethods, help="search method (default: astar)")
+    parser.add_argument("--rows", type=int, default=3, help="number of rows (default: 3)")
+    parser.add_argument("--cols", type=int, default=3, help="number of columns (default: 3)")
+    parser.add_argument("--target", help="target tiles used when a line doesn't give one (default: 0 1 2 ...)")
+    parser.add_argument("--progress", type=int, default=0, metavar="N", help="write a JSON progress record to stderr every N nodes expanded")
+    parser.add_argument("--output", metavar="FILE", help="write the JSON lines (or generated grids) to FILE instead of standard output")
+    parser.add_argument("--generate", type=int, metavar="N", help="write N random grids that can reach the target, one per line, instead of solving")
+    parser.add_argument("--seed", type=int, help="seed for --generate, to make the same grids again")
+    parser.add_argument("--walk", type=int, metavar="MOVES", help="with --generate, make each grid by MOVES random moves back from the target")
+    parser.add_argument("--depth", type=int, help="with --generate, draw grids exactly DEPTH moves from the target (boards of up to 9 positions)")
+    return parser.parse_args()
+
+def main():
+    """Runs the interactive menu."""
+    rows, cols = (3,3) # Rows and Columns (by default 3 x 3)
+    debug = False # If DEBUG mode is set to True, the program will print information about each node.
+    quitter = False # Set to False whilst user doesn't want to quit
+    clearConsole()
+
     print("Welcome to the 8 Tile Puzzle A* Search.")
     print()
-    print("Menu:")
-    print("1. Run")
-    print("2. View Current Information")
-    print("3. Customise")
-    print("4. Quit")
-    userchoice = input() # User enters their choice
-
-    if userchoice == '1':
-        if ispossible == True:
-            t0 = time.time() # Start timer
-            print("Running, this may take some time:") # May take up to 20 minutes
-            puzzlegrid = State(startgrid, 0, []) # Creates start state
-            while puzzlegrid.grid != targetgrid: # While solution not found.
-                moves = possiblemoves(puzzlegrid.grid) # Generates possible child nodes of the current state
-                for move in moves: # For each move
-                    route = State(move,distance,puzzlegrid) # Create a State object from the grid and its g and h values
-                    # Check if node is in closed list.
-                    if route.grid not in donemoves:
-                        routes.put((route.f, route)) # If not, add to priority queue.
-                nextmove = routes.get()[1] # Returns the state from the next node.
-                donemoves.append(nextmove.grid) # Adds grid to closed list
-                puzzlegrid = nextmove # Updates current state
-                distance = puzzlegrid.g + 1 # Increment distance
-                if debug == True:
-                    printfgh(puzzlegrid) # If DEBUG mode, print node information
-                if routes.empty():
+    print("Before we begin...")
+    general = input("Would you like to choose the start and target grids? Enter '1' if so (any other input will result in using the example grid). ")
+    if general == '1':
+        print("Enter start grid: ")
+        startgrid = setupgrid(usersetgrid(cols, rows), rows, cols) # Sets up grid using setupgrid() and usersetgrid()
+        print("Enter target grid: ")
+        targetgrid = setupgrid(usersetgrid(cols, rows), rows, cols) # Sets up grid using setupgrid() and usersetgrid()
+    else:
+        startgrid = setupgrid([7,2,4,5,0,6,8,3,1], rows, cols) # Default starting grid (set to example from specification)
+        targetgrid = setupgrid([0,1,2,3,4,5,6,7,8], rows, cols) # Default target grid (how the puzzle normally works)
+    h = inputh()
+    printcurrentinfo(startgrid, targetgrid, h)
+
+    # MAIN MENU SECTION
+    while quitter == False:
+        clearConsole()
+        ispossible = calculatepossible(startgrid, targetgrid, rows, cols, debug)
+        print("Welcome to the 8 Tile Puzzle A* Search.")
+        print()
+        print("Menu:")
+        print("1. Run")
+        print("2. Run IDA* (Memory Bounded)")
+        print("3. Run Bidirectional A*")
+        print("4. Solve From Exact Distance Table (Up to 3x3)")
+        print("5. View Current Information")
+        print("6. Customise")
+        print("7. Quit")
+        userchoice = input() # User enters their choice
+
+        if userchoice in ('1', '2', '3', '4'):
+            if ispossible == True:
+                method = searchmethods[int(userchoice)-1] # A*, IDA*, Bidirectional A* or table lookup
+                print("Running, this may take some time:") # May take up to 20 minutes
+                stats = SearchStats(1000 if debug else 0) # In DEBUG mode, prints a progress record every 1000 nodes
+                try:
+                    result = solve(startgrid, targetgrid, h, rows, cols, method, stats)
+                except ValueError as error: # The exact distance table asked for on a board over 9 positions
+                    print("Unable to run: " + str(error) + ".")
+                    input("To return to the menu, please press enter...")
+                    continue
+
+                #grid printing
+                if result.solved:
+                    print(True)
+                    printsolution(result.solution, cols)
+                else:
                     print("Solution Impossible...") # If there are no more possible moves, then finding a solution is impossible.
-                    break
-
-            t1 = time.time() # End timer
-
-            #grid printing
-            if puzzlegrid.grid == targetgrid:
-                print(True)
-                solution = []
-                node = puzzlegrid 
-                while node != startgrid: # Recursion to find parent nodes.
-                    if node == []:
-                        # Base case
-                        break
-                    else:
-                        solution.append(node.grid) # Add node to path
-                        node = node.ls # Find node's parent
-
-                solution.reverse() # Reverse path so it is order of traversal
-                i = 0
-                for grid in solution:
-                    print(str(i) + ")")
-                    printgrid(grid) # Print steps
-                    i += 1
 
-            print()
-            timetaken = t1-t0 # Finds time taken.
-            print("Running finished. Time taken: " + str(timetaken) + " seconds. (" + str(timetaken/60) + " minutes)")
-        else:
-            print("Not mathematically possible to reach solution. Please try a different starting grid.")
-        input("To return to the menu, please press enter...")
-    
-    elif userchoice == '2':
-        printcurrentinfo(startgrid, targetgrid, h)
-            
-    elif userchoice == '3':
-        cols, rows, debug, startgrid, targetgrid, h= customise(cols, rows, debug, startgrid, targetgrid, h) # Go to customisation menu
+                print("Nodes expanded: " + str(result.expanded))
+                if debug == True:
+                    print(json.dumps(stats.summary())) # Full search statistics
+                print()
+                timetaken = result.timetaken # Finds time taken.
+                print("Running finished. Time taken: " + str(timetaken) + " seconds. (" + str(timetaken/60) + " minutes)")
+            else:
+                print("Not mathematically possible to reach solution. Please try a different starting grid.")
+            input("To return to the menu, please press enter...")
 
-    elif userchoice == '4':
-        quitter = True # Ends program
+        elif userchoice == '5':
+            printcurrentinfo(startgrid, targetgrid, h)
 
-    
+        elif userchoice == '6':
+            cols, rows, debug, startgrid, targetgrid, h= customise(cols, rows, debug, startgrid, targetgrid, h) # Go to customisation menu
+
+        elif userchoice == '7':
+            quitter = True # Ends program
+
+if __name__ == "__main__":
+    arguments = parsearguments()
+    if arguments.generate is not None:
+        rungenerate(arguments)
+    elif arguments.batch is not None:
+        runbatch(arguments)
+    else:
+        main()
@@ -0,0 +1,247 @@
+import argparse
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+from Solvers import directory, puzzle, sudoku
+
+### CORPUS ###
+
+depthbuckets = [4, 8, 12, 16, 20, 24, 28] # Optimal solution lengths 8-puzzle instances are picked at
+fifteenwalks = [30, 50, 70] # Random walk lengths the 15-puzzle instances are made with
+hardsudokus = {
+    "inkala": "800000000003600000070090200050007000000045700000100030001000068008500010090000400",
+    "norvig-hard": "4.....8.5.3..........7......2.....6.....8.4......1.......6.3.7.5..2.....1.4......",
+    "17-clue": "000000010400000000020000000000050407008000300001090000300400200050100000000806000",
+}
+
+def eightpuzzlecorpus(perbucket, generator):
+    """Draws perbucket 8-puzzle instances at each of depthbuckets (see generateinstances in 8PuzzleAStar.py).
+    Returns a list of (name, start, target) tuples.
+
+    Keyword arguments:
+    perbucket -- the number of instances at each depth.
+    generator -- the random.Random to draw from.
+    """
+    target = bytes(range(9))
+    corpus = []
+    for depth in depthbuckets:
+        starts = puzzle.generateinstances(perbucket, target, 3, 3, generator, depth=depth)
+        corpus += [("8-puzzle d%d #%d" % (depth, i), start, target) for i, start in enumerate(starts)]
+    return corpus
+
+def fifteenpuzzlecorpus(generator):
+    """Makes one 15-puzzle instance for each of fifteenwalks. Returns a list of (name, start, target) tuples.
+
+    Keyword arguments:
+    generator -- the random.Random to draw from.
+    """
+    target = bytes(range(16))
+    return [("15-puzzle walk%d" % length, puzzle.walkgrid(target, 4, 4, length, generator), target) for length in fifteenwalks]
+
+def sudokucorpus():
+    """Returns the Sudokus as a list of (name, grid) tuples: the Grid files in this directory, then hardsudokus."""
+    corpus = [(name, sudoku.importgrid(os.path.join(directory, name))) for name in ("Grid1.ss", "Grid2.ss", "Grid3.ss")]
+    return corpus + [(name, sudoku.grid_of(sudoku.parse_puzzle(cells))) for name, cells in hardsudokus.items()]
+
+### CONFIGURATIONS ###
+
+puzzleconfigs = [ # (name, heuristic, method, largest board it is run on)
+    ("misplaced/astar", 0, "astar", 9),
+    ("manhattan/astar", 1, "astar", 9),
+    ("doublemisplaced/astar", 2, "astar", 9),
+    ("linearconflict/astar", 3, "astar", 16),
+    ("pdb/astar", 4, "astar", 16),
+    ("linearconflict/idastar", 3, "idastar", 16),
+    ("pdb/idastar", 4, "idastar", 16),
+    ("linearconflict/bidirectional", 3, "bidirectional", 9),
+    ("table", 5, "table", 9),
+]
+
+gaconfigs = [ # (name, backend, settings applied to SodokuEA)
+    ("exact", "exact", {}),
+    ("ga-standard", "evolve", {"MODE": "standard", "POPULATION_SIZE": 2000, "NUMBER_GENERATION": 100}),
+    ("ga-permutation", "evolve", {"MODE": "permutation", "POPULATION_SIZE": 2000, "NUMBER_GENERATION": 100}),
+]
+
+### MEASUREMENT ###
+
+def measure(function, memory):
+    """Runs function once and returns (its result, wall time in seconds, peak traced memory in bytes).
+    With memory set, the function is run a second time under tracemalloc for the peak, so the wall time
+    isn't slowed by the tracing (the peak is None otherwise).
+
+    Keyword arguments:
+    function -- the function to call, with no arguments.
+    memory -- boolean for whether to measure the peak memory.
+    """
+    t0 = time.perf_counter()
+    result = function()
+    timetaken = time.perf_counter() - t0
+    peak = None
+    if memory:
+        tracemalloc.start()
+        function()
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    return result, timetaken, peak
+
+def benchpuzzles(corpus, memory):
+    """Solves every sliding tile instance with every configuration that applies to its board, returning result records.
+
+    Keyword arguments:
+    corpus -- (name, start, target) tuples.
+    memory -- boolean for whether to measure peak memory.
+    """
+    records = []
+    for config, heuristic, method, largest in puzzleconfigs:
+        for name, start, target in corpus:
+            size = len(start)
+            if size > largest:
+                continue
+            rows = cols = int(size ** 0.5)
+            t0 = time.perf_counter()
+            puzzle.getengine(target, rows, cols, heuristic) # Tables are built or loaded here, outside the timing
+            setup = time.perf_counter() - t0
+            result, timetaken, peak = measure(lambda: puzzle.solve(start, target, heuristic, rows, cols, method), memory)
+            records.append({"suite": "puzzle", "config": config, "instance": name, "solved": result.solved,
+                            "moves": result.moves, "nodes": result.expanded, "time": timetaken,
+                            "nodespersecond": result.expanded / timetaken if timetaken > 0 else None,
+                            "peakmemory": peak, "setup": setup})
+            report(records[-1])
+    return records
+
+def benchsudokus(corpus, memory, seed):
+    """Solves every Sudoku with every configuration in gaconfigs, returning result records.
+
+    Keyword arguments:
+    corpus -- (name, grid) tuples.
+    memory -- boolean for whether to measure peak memory.
+    seed -- the seed each evolutionary run starts from.
+    """
+    records = []
+    sudoku.REPORT_INTERVAL = 0 # Silent
+    defaults = {key: getattr(sudoku, key) for _, _, settings in gaconfigs for key in settings}
+    for config, backend, settings in gaconfigs:
+        for key, value in {**defaults, **settings}.items():
+            setattr(sudoku, key, value)
+        for name, grid in corpus:
+            def run():
+                sudoku.rng = np.random.default_rng(seed) # Same draws for the timed and the traced run
+                return sudoku.solve(grid, backend)
+            (best, fitness, status, nodes), timetaken, peak = measure(run, memory)
+            generations = sudoku.generations_run() if backend == "evolve" else None
+            records.append({"suite": "sudoku", "config": config, "instance": name, "solved": status == "solved",
+                            "status": status, "fitness": fitness, "nodes": nodes, "generations": generations,
+                            "time": timetaken,
+                            "nodespersecond": nodes / timetaken if nodes is not None and timetaken > 0 else None,
+                            "generationspersecond": generations / timetaken if generations and timetaken > 0 else None,
+                            "peakmemory": peak})
+            report(records[-1])
+    for key, value in defaults.items():
+        setattr(sudoku, key, value)
+    return records
+
+def summarise(records):
+    """Totals the records for each suite and configuration, returning a dictionary keyed on 'suite/config'."""
+    summary = {}
+    for record in records:
+        key = record["suite"] + "/" + record["config"]
+        total = summary.setdefault(key, {"instances": 0, "solved": 0, "time": 0.0, "nodes": 0, "peakmemory": None})
+        total["instances"] += 1
+        total["solved"] += record["solved"]
+        total["time"] += record["time"]
+        total["nodes"] += record["nodes"] or 0
+        if record["peakmemory"] is not None:
+            total["peakmemory"] = max(total["peakmemory"] or 0, record["peakmemory"])
+    for total in summary.values():
+        total["nodespersecond"] = total["nodes"] / total["time"] if total["time"] > 0 else None
+    return summary
+
+def report(record):
+    """Prints one line for a result record."""
+    rate = record.get("generationspersecond") or record.get("nodespersecond")
+    print("%-7s %-30s %-22s %9.4fs %12s/s %s" % (record["suite"], record["config"], record["instance"], record["time"],
+          "-" if rate is None else "%.0f" % rate,
+          "" if record["peakmemory"] is None else "%.0fKiB" % (record["peakmemory"] / 1024)))
+
+def environment():
+    """Describes where the benchmark ran, so runs from different machines or commits can be told apart."""
+    try:
+        commit = subprocess.run(["git", "rev-parse", "HEAD"], cwd=directory, capture_output=True, text=True).stdout.strip() or None
+    except OSError:
+        commit = None
+    return {"commit": commit, "python": platform.python_version(), "numpy": np.__version__,
+            "machine": platform.machine(), "platform": platform.platform(), "time": time.strftime("%Y-%m-%dT%H:%M:%S")}
+
+### COMPARISON ###
+
+def compare(oldfile, newfile, threshold):
+    """Prints the time of every configuration and instance in two benchmark files side by side, marking those
+    more than threshold slower in the new one. Returns the number of regressions.
+
+    Keyword arguments:
+    oldfile -- the earlier benchmark JSON file.
+    newfile -- the later benchmark JSON file.
+    threshold -- the fractional slowdown counted as a regression (e.g. 0.1 for 10%).
+    """
+    with open(oldfile) as f:
+        old = json.load(f)
+    with open(newfile) as f:
+        new = json.load(f)
+    oldrecords = {(r["suite"], r["config"], r["instance"]): r for r in old["results"]}
+    regressions = 0
+    print("%-7s %-30s %-22s %10s %10s %8s" % ("suite", "config", "instance", "old", "new", "change"))
+    for record in new["results"]:
+        key = (record["suite"], record["config"], record["instance"])
+        if key not in oldrecords:
+            continue
+        before, after = oldrecords[key]["time"], record["time"]
+        change = after / before - 1 if before > 0 else 0.0
+        slower = change > threshold
+        regressions += slower
+        print("%-7s %-30s %-22s %9.4fs %9.4fs %+7.1f%%%s" % (key + (before, after, 100 * change, "  REGRESSION" if slower else "")))
+        if oldrecords[key]["solved"] and not record["solved"]:
+            regressions += 1
+            print("%-7s %-30s %-22s no longer solved  REGRESSION" % key)
+    return regressions
+
+def parsearguments():
+    """Reads the command line arguments."""
+    parser = argparse.ArgumentParser(description="Benchmarks the sliding tile and Sudoku solvers on a fixed, seeded corpus.")
+    parser.add_argument("--output", metavar="FILE", default="benchmark.json", help="JSON file results are written to (default: benchmark.json)")
+    parser.add_argument("--seed", type=int, default=2024, help="seed the corpus and the evolutionary runs are drawn from (default: 2024)")
+    parser.add_argument("--per-bucket", type=int, default=3, help="8-puzzle instances at each depth (default: 3)")
+    parser.add_argument("--only", choices=["puzzle", "sudoku"], help="run one suite only")
+    parser.add_argument("--no-memory", action="store_true", help="skip the tracemalloc peak memory runs")
+    parser.add_argument("--compare", nargs=2, metavar=("OLD", "NEW"), help="compare two result files instead of running")
+    parser.add_argument("--threshold", type=float, default=0.1, help="slowdown counted as a regression when comparing (default: 0.1)")
+    return parser.parse_args()
+
+def main():
+    arguments = parsearguments()
+    if arguments.compare:
+        regressions = compare(arguments.compare[0], arguments.compare[1], arguments.threshold)
+        print(str(regressions) + " regression(s).")
+        sys.exit(1 if regressions else 0)
+    generator = random.Random(arguments.seed)
+    memory = not arguments.no_memory
+    records = []
+    if arguments.only in (None, "puzzle"):
+        corpus = eightpuzzlecorpus(arguments.per_bucket, generator) + fifteenpuzzlecorpus(generator)
+        records += benchpuzzles(corpus, memory)
+    if arguments.only in (None, "sudoku"):
+        records += benchsudokus(sudokucorpus(), memory, arguments.seed)
+    with open(arguments.output, "w") as f:
+        json.dump({"environment": environment(), "seed": arguments.seed, "results": records, "summary": summarise(records)}, f, indent=1)
+    print("Results written to " + arguments.output)
+
+if __name__ == "__main__":
+    main()
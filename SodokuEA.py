@@ -1,94 +1,302 @@
 # SODOKU EVOLUTIONARY ALGORITHM  
 
-from random import choice, random, seed
+import csv
+import gzip
+import json
+import multiprocessing
+import os
+import queue
+import re
 import time 
 
+import numpy as np
+
 ### EVOLUTIONARY ALGORITHM ###
 
-def evolve():
+def evolve(mode="standard"):
+    # mode is "standard", or "permutation" to keep every row a permutation of 1-9 that respects the givens.
+    # Stops at a solution, after NUMBER_GENERATION generations or once TIME_LIMIT seconds have passed.
+    # Each generation is recorded in telemetry and passed to report.
+    del telemetry[:]
+    deadline = None if TIME_LIMIT is None else time.time() + TIME_LIMIT
     currentbest = [] # The current best individual.
-    population = create_pop() # Creates population
+    population = create_pop() if mode == "standard" else create_perm_pop() # Creates population
     fitness_population = evaluate_pop(population) # Evaluates population
+    rate, stale = MUTATION_RATE, 0 # Mutation rate in use, and generations since the best fitness improved
     for gen in range(NUMBER_GENERATION):
-        mating_pool = select_pop(population, fitness_population) # creates mating pool
-        offspring_population = crossover_pop(mating_pool) # Crossover
-        population = mutate_pop(offspring_population) # Mutated population
-        fitness_population = evaluate_pop(population) # Evaluate fitness
+        timings = dict.fromkeys(PHASES, 0.0)
+        population, fitness_population = next_generation(population, fitness_population, mode, rate, timings) # Select, crossover, mutate and evaluate
         best = best_pop(population, fitness_population) # Finds the best value in current value
         best_ind, best_fit = best[0], best[1] 
-        print("#%3d" % gen, "fit: %3d" % best_fit) # Print out best fir
-        print_sudoku(best_ind) # Print best grid
-        if currentbest != []: # If there is a current best grid
-            if best_fit < currentbest[1]: # If it is a better fit
-                currentbest = best # Update current best
+        record = dict(generation=gen, **timings, best=int(best_fit), mean=float(fitness_population.mean()),
+                      diversity=float(diversity_pop(population)), mutation_rate=rate, event="")
+        if currentbest == [] or best_fit < currentbest[1]: # If there isn't a current best grid or this is a better fit
+            currentbest = (best_ind.copy(), best_fit) # Update current best
+            rate, stale = MUTATION_RATE, 0
         else:
-            currentbest = best # Set current best  if there isn't one
+            stale += 1
+        if best_fit != 0 and stale >= PLATEAU_GENERATIONS: # Stuck, so shake the population up
+            new_population, fitness_population, rate = escape_plateau(population, fitness_population, mode, rate)
+            record["event"] = "mutation rate %.1f" % rate if new_population is population else "reseeded"
+            population, stale = new_population, 0
+        telemetry.append(record)
+        report(record)
         if best_fit == 0: # If solution found
             break # Exit loop
+        if deadline is not None and time.time() >= deadline: # Out of time
+            break
 
     return currentbest # Return current best
 
+def next_generation(population, fitness_population, mode="standard", rate=None, timings=None):
+    # rate is the mutation rate to use (MUTATION_RATE if None). If timings is a dict, the seconds spent in each of
+    # PHASES are added to it.
+    clock = [time.perf_counter()]
+    def lap(phase):
+        now = time.perf_counter()
+        if timings is not None:
+            timings[phase] += now - clock[0]
+        clock[0] = now
+    mating_pool = select_pop(population, fitness_population) # creates mating pool
+    lap("select")
+    if mode == "permutation":
+        offspring_population = crossover_rows_pop(mating_pool) # Crossover (whole rows, so they stay permutations)
+        lap("crossover")
+        fitness_population = evaluate_pop(offspring_population) # Evaluate fitness
+        lap("evaluate")
+        population, fitness_population = swap_mutate_pop(offspring_population, fitness_population, rate) # Swap mutation, updating the fitness as it goes
+        lap("mutate")
+        return population, fitness_population
+    offspring_population = crossover_pop(mating_pool) # Crossover
+    lap("crossover")
+    population = mutate_pop(offspring_population, rate) # Mutated population
+    lap("mutate")
+    fitness_population = evaluate_pop(population) # Evaluate fitness
+    lap("evaluate")
+    return population, fitness_population
+
+def escape_plateau(population, fitness_population, mode, rate):
+    # Called when the best fitness hasn't improved for PLATEAU_GENERATIONS generations. The mutation rate is raised
+    # by MUTATION_BOOST, up to MAX_MUTATION_RATE. Once it is already there, or the population has lost its diversity
+    # (below MIN_DIVERSITY), the population is created again, keeping its ELITES best individuals, and the mutation
+    # rate goes back to MUTATION_RATE. Returns (population, fitness_population, rate).
+    if rate < MAX_MUTATION_RATE and diversity_pop(population) >= MIN_DIVERSITY:
+        rate = min(rate * MUTATION_BOOST, MAX_MUTATION_RATE)
+        return population, fitness_population, rate
+    keep = min(ELITES, len(population))
+    elites = np.argpartition(fitness_population, keep - 1)[:keep] if keep > 0 else []
+    new_population = create_pop() if mode == "standard" else create_perm_pop()
+    new_population[:len(elites)] = population[elites]
+    return new_population, evaluate_pop(new_population), MUTATION_RATE
+
+### TELEMETRY ###
+
+PHASES = ["evaluate", "select", "crossover", "mutate"] # Parts of a generation that are timed
+telemetry = [] # One record (a dict) per generation of the last evolve run
+
+def report(record):
+    # Passes a generation's record to REPORT_CALLBACK, and prints a line for it every REPORT_INTERVAL generations
+    # (and whenever the population is shaken up).
+    if REPORT_CALLBACK is not None:
+        REPORT_CALLBACK(record)
+    if REPORT_INTERVAL > 0 and (record["generation"] % REPORT_INTERVAL == 0 or record["event"]):
+        print("#%3d fit: %3d mean: %6.2f diversity: %.3f" % (record["generation"], record["best"], record["mean"], record["diversity"]),
+              " ".join("%s %.1fms" % (phase, 1000 * record[phase]) for phase in PHASES), record["event"])
+
+def generations_run():
+    # Generations the last evolve run went through (the longest running island's, for an island run).
+    return max((record["generation"] + 1 for record in telemetry), default=0)
+
+def export_telemetry(filename):
+    # Writes telemetry to filename, as CSV if it ends in .csv and as JSON otherwise.
+    with open(filename, "w", newline="") as f:
+        if filename.endswith(".csv"):
+            writer = csv.DictWriter(f, fieldnames=["generation"] + PHASES + ["best", "mean", "diversity", "mutation_rate", "event"])
+            writer.writeheader()
+            writer.writerows(telemetry)
+        else:
+            json.dump(telemetry, f, indent=1)
+
 ### POPULATION-LEVEL OPERATORS ###
+# The population is a (POPULATION_SIZE, 9, 9) uint8 array and every random draw comes from rng.
 
 def create_pop():
-    return [ create_ind() for _ in range(POPULATION_SIZE) ] # Creates a population (list of individuals). 
+    row, col = np.broadcast_arrays(*np.indices((9, 9)), np.empty((POPULATION_SIZE, 9, 9)))[:2] # Row and column of every cell of every individual
+    return np.where(fixed, np.asarray(grid, dtype=np.uint8), random_values(row, col)) # Givens kept, blanks filled with possible numbers.
 
 def evaluate_pop(population):
-    return [ evaluate_ind(individual) for individual in population ] # Creates a list of the fitness of each individual in the population.
+    # Same fitness as evaluate_ind, for the whole population at once.
+    # A row, column or sub grid holding d distinct numbers has 9 - d repeats, so the fitness is 27 * 9 minus the
+    # distinct numbers summed over all of them. Each cell becomes a one-hot bit (1 << number), the bits are ORed
+    # along rows, columns and sub grids, and the set bits counted.
+    population = np.asarray(population, dtype=np.uint8)
+    bits = ONE_HOT[population] # (individual, row, column) array of 1 << number
+    in_row = np.bitwise_or.reduce(bits, axis=2) # Numbers present in each row
+    in_col = np.bitwise_or.reduce(bits, axis=1) # Numbers present in each column
+    in_box = np.bitwise_or.reduce(bits.reshape(len(population), 3, 3, 3, 3).transpose(0, 1, 3, 2, 4).reshape(len(population), 9, 9), axis=2) # Numbers present in each sub grid
+    distinct = BIT_COUNT[in_row].sum(axis=1) + BIT_COUNT[in_col].sum(axis=1) + BIT_COUNT[in_box].sum(axis=1)
+    return 27 * 9 - distinct.astype(np.int64) # Array of the fitness of each individual in the population.
 
 def select_pop(population, fitness_population):
-    sorted_population = sorted(zip(population, fitness_population), key = lambda ind_fit: ind_fit[1]) # Zips the population with its fitness. Then sorts them based on lowest fitness.
-    return [ individual for individual, fitness in sorted_population[:int(POPULATION_SIZE * TRUNCATION_RATE)] ]
+    size = int(POPULATION_SIZE * TRUNCATION_RATE)
+    fittest = np.argpartition(fitness_population, size - 1)[:size] # Indices of the lowest fitness individuals, in no particular order.
+    return population[fittest]
 
 def crossover_pop(population):
-    return [ crossover_ind(choice(population), choice(population)) for _ in range(POPULATION_SIZE) ] # Crossover function.
-
-def mutate_pop(population):
-    return [ mutate_ind(individual) for individual in population ] # Mutates each individual in population.
+    parent1 = population[rng.integers(len(population), size=POPULATION_SIZE)] # Random parents from the mating pool.
+    parent2 = population[rng.integers(len(population), size=POPULATION_SIZE)]
+    return np.where(rng.random((POPULATION_SIZE, 9, 9)) < 0.5, parent1, parent2) # Each cell taken from either parent.
+
+def mutate_pop(population, rate=None):
+    rate = MUTATION_RATE if rate is None else rate
+    mutate = (rng.random(population.shape) < rate / 81) & ~fixed # About rate cells per individual, never a given.
+    individual, row, col = np.nonzero(mutate)
+    population = population.copy()
+    population[individual, row, col] = random_values(row, col) # Change to possible numbers.
+    return population
+
+def create_perm_pop():
+    population = np.array(np.broadcast_to(np.asarray(grid, dtype=np.uint8), (POPULATION_SIZE, 9, 9)))
+    for row in range(9):
+        blanks, missing = row_blanks[row, :row_blank_count[row]], row_missing[row, :row_blank_count[row]]
+        redraw = np.arange(POPULATION_SIZE)
+        for _ in range(SHUFFLE_TRIES): # Reshuffle rows that put a number outside a cell's candidates
+            order = np.argsort(rng.random((len(redraw), len(blanks))), axis=1) # A random shuffle per individual
+            population[redraw[:, None], row, blanks] = missing[order] # Blanks filled with the row's missing numbers, each used once.
+            allowed = (candidate_masks[row, blanks] >> population[redraw[:, None], row, blanks]) & 1
+            redraw = redraw[~allowed.all(axis=1)]
+            if len(redraw) == 0:
+                break
+    return population
+
+def crossover_rows_pop(population):
+    parent1 = population[rng.integers(len(population), size=POPULATION_SIZE)] # Random parents from the mating pool.
+    parent2 = population[rng.integers(len(population), size=POPULATION_SIZE)]
+    return np.where(rng.random((POPULATION_SIZE, 9, 1)) < 0.5, parent1, parent2) # Each row taken whole from either parent.
+
+def swap_mutate_pop(population, fitness_population, rate=None):
+    # Swaps two blank cells in a random row of about rate (MUTATION_RATE if None) individuals each (rows stay permutations).
+    # Only the two columns and sub grids the swap touches are rescored, to update the fitness.
+    population, fitness_population = population.copy(), fitness_population.copy()
+    rows = np.flatnonzero(row_blank_count >= 2) # Rows with something to swap
+    if len(rows) == 0:
+        return population, fitness_population
+    rate = MUTATION_RATE if rate is None else rate
+    rounds = int(np.ceil(rate))
+    for _ in range(rounds):
+        individual = np.flatnonzero(rng.random(len(population)) < rate / rounds)
+        row = rows[rng.integers(len(rows), size=len(individual))]
+        count = row_blank_count[row]
+        first = (rng.random(len(individual)) * count).astype(np.int64)
+        second = (rng.random(len(individual)) * (count - 1)).astype(np.int64)
+        second += second >= first # Two different blanks
+        col1, col2 = row_blanks[row, first], row_blanks[row, second]
+        allowed = ((candidate_masks[row, col1] >> population[individual, row, col2]) & (candidate_masks[row, col2] >> population[individual, row, col1]) & 1).astype(bool)
+        individual, row, col1, col2 = individual[allowed], row[allowed], col1[allowed], col2[allowed] # Only swaps that keep both numbers candidates
+        before = unit_repeats(population, individual, row, col1, col2)
+        population[individual, row, col1], population[individual, row, col2] = population[individual, row, col2], population[individual, row, col1]
+        fitness_population[individual] += unit_repeats(population, individual, row, col1, col2) - before
+    return population, fitness_population
+
+def unit_repeats(population, individual, row, col1, col2):
+    # Repeats in columns col1 and col2 and in the sub grids of (row, col1) and (row, col2) (counted once if the same) of each individual.
+    cells = population.reshape(len(population), 81)
+    box1, box2 = row // 3 * 3 + col1 // 3, row // 3 * 3 + col2 // 3
+    repeats = 0
+    for values in (population[individual, :, col1], population[individual, :, col2], cells[individual[:, None], BOX_CELLS[box1]]):
+        repeats = repeats + 9 - BIT_COUNT[np.bitwise_or.reduce(ONE_HOT[values], axis=1)].astype(np.int64)
+    other_box = 9 - BIT_COUNT[np.bitwise_or.reduce(ONE_HOT[cells[individual[:, None], BOX_CELLS[box2]]], axis=1)].astype(np.int64)
+    return repeats + np.where(box1 != box2, other_box, 0)
+
+def diversity_pop(population):
+    # Share of the blanks, over the whole population, that don't hold the most common number for that cell
+    # (0 once every individual is the same).
+    cells = population.reshape(len(population), 81)
+    blanks = np.flatnonzero(~fixed.reshape(81))
+    if len(blanks) == 0:
+        return 0.0
+    counts = np.bincount((cells[:, blanks] + 10 * np.arange(len(blanks))).ravel(), minlength=10 * len(blanks)).reshape(len(blanks), 10)
+    return 1 - counts.max(axis=1).sum() / (len(population) * len(blanks))
 
 def best_pop(population, fitness_population):
-    return sorted(zip(population, fitness_population), key = lambda ind_fit: ind_fit[1])[0] # Returns the best in the population.
+    best = np.argmin(fitness_population)
+    return population[best], fitness_population[best] # Returns the best in the population.
 
 ### INDIVIDUAL-LEVEL OPERATORS: REPRESENTATION & PROBLEM SPECIFIC ###
 
 alphabet = [1,2,3,4,5,6,7,8,9] # List of possible values.
+ONE_HOT = (1 << np.arange(10)).astype(np.uint16) # Bit for each value a cell can hold (0 included, so blanks count too).
+BOX_CELLS = np.array([[(3 * (box // 3) + i // 3) * 9 + 3 * (box % 3) + i % 3 for i in range(9)] for box in range(9)]) # Cell numbers (row * 9 + column) in each sub grid.
+BIT_COUNT = np.array([bin(mask).count("1") for mask in range(1 << 10)], dtype=np.uint8) # Number of set bits in each 10 bit mask.
+UNIT_CELLS = np.array([[r * 9 + c for c in range(9)] for r in range(9)] + [[r * 9 + c for r in range(9)] for c in range(9)] + BOX_CELLS.tolist()) # Cell numbers in each row, column and sub grid.
+ALL_NUMBERS = int(ONE_HOT[1:].sum()) # Mask with the bit of every number 1-9 set.
 
 def importgrid(filename):
-    f = open(filename, "r") # Opens file
-    rowcount = 1 # Counts current row
-    grid = [] # Output grid
-    for row in f: # for each row
-        if rowcount != 4: 
-            if rowcount != 8:
-                # Rows aren't the gaps
-                thisrow = []
-                for letter in row:
-                    if letter not in str(alphabet): # If not a value
-                        if letter == ".": # If it is blank space
-                            thisrow.append(0) # put a 0
-                    else:
-                        thisrow.append(int(letter)) # Is value then add it
-
-                grid.append(thisrow) # Add to grid
-
-        rowcount += 1 # Increment row
-    
-    return grid # Return grid
-
-def create_ind():
-    newgrid = [] # New grid
-    for row in grid:
-        already = set(row) # Numbers already in row
-        if 0 in already:
-            already.remove(0) # Remove 0 if it in row
-        possnumber = [x for x in alphabet if x not in already] # Calculates all possible numbers from numbers not already in the row.
-        newrow = []
-        for number in row:
-            if number == 0: #if number is a 0
-                number = choice(possnumber) # Replace it with a possible number.
-            newrow.append(number)
-        newgrid.append(newrow)
-    return newgrid # Returns new grid (individual in population)
+    # Reads the first puzzle in filename (see load_puzzles) as a list of rows.
+    for puzzle in load_puzzles(filename):
+        return grid_of(puzzle)
+    raise ValueError("%s holds no puzzle" % filename)
+
+def propagate(puzzle):
+    # Fills in the cells the givens force, before any evolution. Each cell gets a mask of the numbers it could still
+    # hold (bit n for number n, as in ONE_HOT) from its row, column and sub grid. A blank with one candidate left is
+    # set to it (naked single), as is a blank that is the only place left for a number in one of its rows, columns
+    # or sub grids (hidden single). Repeats until nothing changes.
+    # Returns the filled grid and the (9, 9) candidate masks (a filled cell's mask is just its own bit).
+    board = np.array(puzzle, dtype=np.uint8).reshape(81)
+    while True:
+        bits = ONE_HOT[board] & ALL_NUMBERS # Bit of each filled cell, 0 for blanks
+        placed = np.bitwise_or.reduce(bits[UNIT_CELLS], axis=1) # Numbers already in each unit
+        if (BIT_COUNT[placed] != (board[UNIT_CELLS] != 0).sum(axis=1)).any():
+            raise ValueError("puzzle repeats a number in a row, column or sub grid")
+        seen = np.zeros(81, dtype=np.uint16) # Numbers in the row, column or sub grid of each cell
+        for unit, numbers in zip(UNIT_CELLS, placed):
+            seen[unit] |= numbers
+        blank = board == 0
+        masks = np.where(blank, ALL_NUMBERS & ~seen, bits)
+        if (masks[blank] == 0).any():
+            raise ValueError("puzzle has a blank with no possible number")
+        forced = np.where(blank & (BIT_COUNT[masks] == 1), masks, 0) # Naked singles
+        places = (masks[UNIT_CELLS, None] >> np.arange(10)) & 1 & blank[UNIT_CELLS, None] # (unit, cell, number) blanks that could hold the number
+        count = places.sum(axis=1)
+        missing = (ALL_NUMBERS & ~placed)[:, None] >> np.arange(10) & 1 # Numbers each unit still needs
+        if (missing & (count == 0)).any():
+            raise ValueError("puzzle has a number with nowhere left to go")
+        unit, number = np.nonzero((count == 1) & (missing == 1))
+        forced[UNIT_CELLS[unit, places[unit, :, number].argmax(axis=1)]] |= ONE_HOT[number] # Hidden singles
+        if not forced.any():
+            return board.reshape(9, 9).tolist(), masks.reshape(9, 9)
+        forced_cells = np.flatnonzero(forced)
+        if (BIT_COUNT[forced[forced_cells]] != 1).any():
+            raise ValueError("puzzle forces two numbers into one cell")
+        board[forced_cells] = np.log2(forced[forced_cells]).astype(np.uint8)
+
+def setup_grid(puzzle):
+    # Sets the grid the operators work on, and the tables worked out from it. Cells forced by the givens are filled
+    # in first (see propagate) and the blanks left only ever take numbers from their own candidates.
+    global grid, fixed, candidate_masks, candidates, candidate_count, row_blanks, row_missing, row_blank_count
+    grid, candidate_masks = propagate(puzzle)
+    fixed = np.asarray(grid) != 0 # True for the givens and forced cells, which are never changed.
+    candidates = np.zeros((9, 9, 9), dtype=np.uint8) # Possible numbers for each cell (first candidate_count of them are used).
+    candidate_count = np.zeros((9, 9), dtype=np.int64)
+    for i in range(9):
+        for j in range(9):
+            possnumber = [x for x in alphabet if candidate_masks[i, j] >> x & 1] # Numbers not in the cell's row, column or sub grid.
+            candidates[i, j, :len(possnumber)] = possnumber
+            candidate_count[i, j] = len(possnumber)
+    row_blanks = np.zeros((9, 9), dtype=np.int64) # Columns of the blanks in each row (first row_blank_count of them are used).
+    row_missing = np.zeros((9, 9), dtype=np.uint8) # Numbers missing from each row.
+    row_blank_count = np.zeros(9, dtype=np.int64)
+    for i, row in enumerate(grid):
+        blanks = [j for j, number in enumerate(row) if number == 0]
+        row_blanks[i, :len(blanks)] = blanks
+        row_missing[i, :len(blanks)] = [x for x in alphabet if x not in row]
+        row_blank_count[i] = len(blanks)
+
+def random_values(row, col):
+    # Draws a random possible number for each of the cells at (row, col) (arrays of row and column indices).
+    picks = (rng.random(np.shape(row)) * candidate_count[row, col]).astype(np.int64)
+    return candidates[row, col, picks]
 
 def evaluate_ind(individual):
     sum = 0
@@ -130,33 +338,6 @@ def evaluate_ind(individual):
         
     return sum
 
-def crossover_ind(individual1, individual2):
-    newgrid = []
-    for i in range(len(grid)):
-        newrow = [choice(ch_pair) for ch_pair in zip(individual1[i], individual2[i])] # Generates a new row of different digits
-        newgrid.append(newrow) # Adds it to new grid
-
-    return newgrid # Return new grid
-
-def mutate_ind(individual):
-    for h in range(len(individual)): # For each row
-        row = individual[h]
-        already = set(grid[h]) # values in original grid
-        possnumber = [x for x in alphabet if x not in already] # Numbers that aren't in original grid
-        
-        if possnumber != []: # If there is a list of possible numbers
-            for _ in row: # For each letter
-                if random() < MUTATION_RATE/(len(individual)*len(row)): # If 1/81 chance
-                    # Will change a random letter
-                    success = False
-                    while success == False:
-                        randomnumber = int(random() * len(row)) # random position in row
-                        if individual[h][randomnumber] != grid[h][randomnumber]: # Check its not from starting grid
-                            individual[h][randomnumber] = choice(possnumber) # Change to possible number
-                            success = True # Makes sure an item is updated
-
-    return individual
-
 def print_sudoku(board):
     # Prints the sudoku board
     print("-"*37)
@@ -169,27 +350,302 @@ def print_sudoku(board):
         else:
             print("|" + "   +"*8 + "   |")
 
+### PUZZLE LOADING ###
+# Puzzles are streamed one at a time as 81 bytes (row by row, 0 for a blank), so a corpus never has to fit in memory.
+
+PUZZLE_EXTENSIONS = (".ss", ".sdk", ".gz") # Files read when loading a directory (add ".txt" for corpora stored that way).
+CELL_VALUES = bytes.maketrans(b"0123456789.", bytes(range(10)) + b"\0") # Cell characters to numbers ("." and "0" are blanks).
+NOT_CELL = re.compile(r"[^0-9.]") # Anything that isn't a cell
+NOT_LAYOUT = re.compile(r"[^0-9.!|+\-\s]") # Anything that isn't a cell or part of the .ss layout
+
+def load_puzzles(source, on_error=None):
+    # Lazily yields every puzzle in source, which is a file, a directory (every PUZZLE_EXTENSIONS file in it and
+    # below, in name order) or a list of either. Files ending .gz are decompressed as they are read.
+    # on_error is passed on to read_puzzles.
+    if isinstance(source, (str, os.PathLike)):
+        source = [source]
+    for path in source:
+        if os.path.isdir(path):
+            for folder, folders, files in os.walk(path):
+                folders.sort()
+                for name in sorted(files):
+                    if name.endswith(PUZZLE_EXTENSIONS):
+                        yield from read_puzzles(os.path.join(folder, name), on_error)
+        else:
+            yield from read_puzzles(path, on_error)
+
+def read_puzzles(filename, on_error=None):
+    # Yields the puzzles in one file, in either format (or a mix): the .ss layout of nine rows of nine cells with
+    # "!" between sub grids and "---!---!---" lines between bands, or one puzzle of 81 cells per line.
+    # Blank lines and anything after a "#" are ignored. Raises ValueError for anything else, unless on_error is given:
+    # then it is called with the "file:line: problem" message, the bad puzzle is skipped and reading carries on
+    # (a file that can't be read or decoded at all is reported and skipped the same way).
+    def bad(message):
+        if on_error is None:
+            raise ValueError(message)
+        on_error(message)
+
+    opener = gzip.open if str(filename).endswith(".gz") else open
+    try:
+        with opener(filename, "rt") as f: # Closed even if the caller stops early
+            cells = "" # Cells of the puzzle being read, in .ss layout
+            broken = False # Whether one of that puzzle's rows was bad
+            for number, line in enumerate(f, 1):
+                line = line.split("#", 1)[0]
+                row = NOT_CELL.sub("", line)
+                if NOT_LAYOUT.search(line):
+                    problem = "not a puzzle line: %r" % line.strip()
+                elif row == "" or len(row) == 9 or (len(row) == 81 and cells == ""):
+                    problem = None
+                else:
+                    problem = "expected 9 or 81 cells, found %d" % len(row)
+                if problem is not None:
+                    bad("%s:%d: %s" % (filename, number, problem))
+                    if cells == "":
+                        continue # Between puzzles, so only this line is skipped
+                    row, broken = "." * 9, True # Counted as one of the puzzle's rows, so the rows after it still line up
+                if len(row) == 81:
+                    yield parse_puzzle(row)
+                elif len(row) == 9:
+                    cells += row
+                    if len(cells) == 81:
+                        if not broken:
+                            yield parse_puzzle(cells)
+                        cells, broken = "", False
+            if cells != "":
+                bad("%s: last puzzle has %d cells, not 81" % (filename, len(cells)))
+    except (OSError, UnicodeDecodeError) as error:
+        if on_error is None:
+            raise
+        on_error("%s: %s" % (filename, error))
+
+def parse_puzzle(cells):
+    # 81 cell characters to the 81 byte form.
+    if len(cells) != 81 or NOT_CELL.search(cells):
+        raise ValueError("a puzzle is 81 of the characters 0-9 and '.'")
+    return cells.encode("ascii").translate(CELL_VALUES)
+
+def grid_of(puzzle):
+    # 81 byte form to the list of rows the solvers take.
+    return [list(puzzle[row * 9:row * 9 + 9]) for row in range(9)]
+
+def solve_batch(source, backend="exact", on_error=None):
+    # Solves every puzzle in source (see load_puzzles) in turn, yielding (puzzle, result of solve) for each.
+    # Bad puzzles are passed to on_error as "file:line: problem" messages and skipped (see read_puzzles); without
+    # on_error they are printed.
+    if on_error is None:
+        on_error = lambda message: print("Skipped " + message)
+    for puzzle in load_puzzles(source, on_error):
+        yield puzzle, solve(grid_of(puzzle), backend)
+
+### ISLAND MODEL ###
+
+def evolve_islands(islands, mode="standard"):
+    # Runs islands sub-populations (POPULATION_SIZE shared between them) in separate processes.
+    # Every MIGRATION_INTERVAL generations each island sends its best MIGRANTS individuals to the next island
+    # round a ring, and all islands stop as soon as any of them reaches fitness 0.
+    # telemetry gets one summary record from each island, which is passed to report.
+    del telemetry[:]
+    stop = multiprocessing.Event() # Set by the first island to find a solution
+    inboxes = [multiprocessing.Queue() for _ in range(islands)] # Migrants waiting for each island
+    results = multiprocessing.Queue() # Best individual of each island once it stops
+    settings = {"NUMBER_GENERATION": NUMBER_GENERATION, "POPULATION_SIZE": max(POPULATION_SIZE // islands, 2),
+                "TRUNCATION_RATE": TRUNCATION_RATE, "MUTATION_RATE": MUTATION_RATE,
+                "MIGRATION_INTERVAL": MIGRATION_INTERVAL, "MIGRANTS": MIGRANTS, "TIME_LIMIT": TIME_LIMIT,
+                "PLATEAU_GENERATIONS": PLATEAU_GENERATIONS, "MUTATION_BOOST": MUTATION_BOOST,
+                "MAX_MUTATION_RATE": MAX_MUTATION_RATE, "MIN_DIVERSITY": MIN_DIVERSITY, "ELITES": ELITES}
+    seeds = np.random.SeedSequence(SEED).spawn(islands) # Independent random streams, reproducible when SEED is set
+    processes = [multiprocessing.Process(target=run_island, args=(number, grid, seeds[number], inboxes[number],
+                                                                  inboxes[(number + 1) % islands], stop, results, mode, settings))
+                 for number in range(islands)]
+    for process in processes:
+        process.start()
+    currentbest = [] # The current best individual.
+    waiting = set(range(islands)) # Islands yet to report
+    while waiting:
+        try:
+            number, best_ind, best_fit, record = results.get(timeout=1)
+        except queue.Empty: # Check no island died without reporting, or this would wait forever
+            failed = [number for number in waiting if processes[number].exitcode not in (None, 0)]
+            if failed:
+                stop.set()
+                for process in processes:
+                    process.terminate()
+                    process.join()
+                raise RuntimeError("Island %d failed with exit code %d" % (failed[0], processes[failed[0]].exitcode))
+            continue
+        waiting.discard(number)
+        telemetry.append(record)
+        report(record)
+        if currentbest == [] or best_fit < currentbest[1]:
+            currentbest = (best_ind, best_fit)
+    for process in processes:
+        process.join()
+    return currentbest # Return current best
+
+def run_island(number, puzzle, seed, inbox, outbox, stop, results, mode, settings):
+    # Evolves one island (run in its own process) and puts (number, best individual, best fitness, summary record) on results.
+    # The summary record is laid out like evolve's telemetry, for the island's last generation, with its phase times totalled.
+    global rng
+    globals().update(settings)
+    rng = np.random.default_rng(seed)
+    deadline = None if TIME_LIMIT is None else time.time() + TIME_LIMIT
+    setup_grid(puzzle)
+    outbox.cancel_join_thread() # Don't wait at exit for migrants nobody will read
+    population = create_pop() if mode == "standard" else create_perm_pop() # Creates population
+    fitness_population = evaluate_pop(population) # Evaluates population
+    best_ind, best_fit = best_pop(population, fitness_population)
+    gen, rate, stale = 0, MUTATION_RATE, 0
+    timings = dict.fromkeys(PHASES, 0.0)
+    while gen < NUMBER_GENERATION and best_fit != 0 and not stop.is_set() and (deadline is None or time.time() < deadline):
+        population, fitness_population = next_generation(population, fitness_population, mode, rate, timings) # Select, crossover, mutate and evaluate
+        gen += 1
+        ind, fit = best_pop(population, fitness_population)
+        if fit < best_fit: # If it is a better fit
+            best_ind, best_fit = ind.copy(), fit
+            rate, stale = MUTATION_RATE, 0
+        else:
+            stale += 1
+        if stale >= PLATEAU_GENERATIONS and fit != 0:
+            population, fitness_population, rate = escape_plateau(population, fitness_population, mode, rate)
+            stale = 0
+        if gen % MIGRATION_INTERVAL == 0 and MIGRANTS > 0:
+            count = min(MIGRANTS, len(fitness_population)) # Small islands can't send more than they hold
+            migrants = np.argpartition(fitness_population, count - 1)[:count]
+            outbox.put((population[migrants], fitness_population[migrants])) # Send the best individuals on
+            while True: # Take in any migrants that have arrived, in place of the worst individuals
+                try:
+                    arrivals, arrival_fitness = inbox.get_nowait()
+                except queue.Empty:
+                    break
+                arrivals, arrival_fitness = arrivals[:len(fitness_population)], arrival_fitness[:len(fitness_population)]
+                worst = np.argpartition(fitness_population, len(fitness_population) - len(arrivals))[-len(arrivals):]
+                population[worst], fitness_population[worst] = arrivals, arrival_fitness
+    if best_fit == 0:
+        stop.set() # Solution found, so every island can stop
+    record = dict(generation=gen - 1, **timings, best=int(best_fit), mean=float(fitness_population.mean()),
+                  diversity=float(diversity_pop(population)), mutation_rate=rate,
+                  event="island %d stopped after %d generations" % (number, gen))
+    results.put((number, best_ind, int(best_fit), record))
+
+### EXACT SOLVER ###
+
+CELL_UNITS = [(cell // 9, cell % 9, cell // 27 * 3 + cell % 9 // 3) for cell in range(81)] # Row, column and sub grid of each cell.
+
+def solve_exact(puzzle, limit=2):
+    # Exact solver: depth-first backtracking over bitmasks of the numbers used in each row, column and sub grid,
+    # always branching on the blank with the fewest candidates. Stops once limit solutions are found, so the default
+    # of 2 is enough to tell a puzzle with no solution from one with a single solution or several.
+    # Returns (solutions, nodes), solutions being a list of grids and nodes the number of numbers tried.
+    board = [number for row in puzzle for number in row]
+    used = [0] * 27 # Numbers used in each row (0-8), column (9-17) and sub grid (18-26), as masks of ONE_HOT bits
+    for cell, number in enumerate(board):
+        if number != 0:
+            row, col, box = CELL_UNITS[cell]
+            if (used[row] | used[9 + col] | used[18 + box]) >> number & 1:
+                return [], 0 # A given is repeated
+            used[row] |= 1 << number; used[9 + col] |= 1 << number; used[18 + box] |= 1 << number
+    blanks = [cell for cell in range(81) if board[cell] == 0]
+    solutions = []
+    nodes = 0
+
+    def search(remaining):
+        nonlocal nodes
+        if remaining == 0:
+            solutions.append([board[row * 9:row * 9 + 9] for row in range(9)])
+            return
+        best, best_count, best_mask = 0, 10, 0
+        for i in range(remaining): # Blank with the fewest candidates
+            row, col, box = CELL_UNITS[blanks[i]]
+            mask = ALL_NUMBERS & ~(used[row] | used[9 + col] | used[18 + box])
+            count = bin(mask).count("1")
+            if count < best_count:
+                best, best_count, best_mask = i, count, mask
+                if count <= 1:
+                    break
+        if best_count == 0:
+            return # Dead end
+        cell = blanks[best]
+        blanks[best], blanks[remaining - 1] = blanks[remaining - 1], cell # Moves it out of the blanks still to fill
+        row, col, box = CELL_UNITS[cell]
+        while best_mask:
+            bit = best_mask & -best_mask # Lowest candidate left
+            best_mask ^= bit
+            nodes += 1
+            board[cell] = bit.bit_length() - 1
+            used[row] ^= bit; used[9 + col] ^= bit; used[18 + box] ^= bit
+            search(remaining - 1)
+            used[row] ^= bit; used[9 + col] ^= bit; used[18 + box] ^= bit
+            if len(solutions) >= limit:
+                break
+        board[cell] = 0 # The blanks still to fill are the same cells, just in a different order
+
+    search(len(blanks))
+    return solutions, nodes
+
+def solve(puzzle, backend="exact"):
+    # Solves puzzle with either backend: "exact" (solve_exact) or "evolve" (the evolutionary algorithm, as set up by
+    # MODE and ISLANDS). Returns (best grid, fitness, status, nodes), status being "solved", "unsolved" (evolve only),
+    # "no solution" or "multiple solutions", and nodes the exact solver's node count (None for evolve).
+    if backend == "exact":
+        solutions, nodes = solve_exact(puzzle)
+        if len(solutions) == 0:
+            return puzzle, None, "no solution", nodes
+        return solutions[0], 0, "solved" if len(solutions) == 1 else "multiple solutions", nodes
+    if backend != "evolve":
+        raise ValueError("unknown backend %r" % backend)
+    del telemetry[:] # Nothing left over from an earlier run if this one ends early
+    try:
+        setup_grid(puzzle)
+    except ValueError:
+        return puzzle, None, "no solution", None
+    best = evolve(MODE) if ISLANDS <= 1 else evolve_islands(ISLANDS, MODE)
+    return np.asarray(best[0]).tolist(), int(best[1]), "solved" if best[1] == 0 else "unsolved", None
+
 ### PARAMERS VALUES ###
 
 NUMBER_GENERATION = 200
 POPULATION_SIZE = 10000
 TRUNCATION_RATE = 0.55
 MUTATION_RATE = 1.0
+TIME_LIMIT = None # Seconds a run may take before it stops with the best found so far (None for no limit).
+PLATEAU_GENERATIONS = 20 # Generations without a better best fitness before the mutation rate is raised or the population reseeded.
+MUTATION_BOOST = 2.0 # Factor the mutation rate is raised by at each plateau.
+MAX_MUTATION_RATE = 8.0 # Highest the mutation rate is raised to before the population is reseeded instead.
+MIN_DIVERSITY = 0.02 # Share of differing blanks (see diversity_pop) below which a plateau reseeds straight away.
+ELITES = 50 # Best individuals kept when the population is reseeded.
+SEED = None # Set to a number to make runs reproducible.
+BACKEND = "exact" # "exact" for the backtracking solver, or "evolve" for the evolutionary algorithm.
+PUZZLES = "Grid1.ss" # Puzzle file (.ss or 81 characters per line, optionally .gz), directory, or list of them.
+MODE = "standard" # "standard", or "permutation" to keep every row a permutation and mutate by swapping.
+REPORT_INTERVAL = 10 # Generations between progress lines (0 for none).
+REPORT_CALLBACK = None # Function called with each generation's telemetry record.
+TELEMETRY_FILE = None # File (.csv or .json) the telemetry of the last run is written to.
+ISLANDS = 1 # Number of sub-populations, each run in its own process (1 for a single population).
+MIGRATION_INTERVAL = 10 # Generations between migrations between islands.
+MIGRANTS = 20 # Individuals each island sends on at each migration.
+SHUFFLE_TRIES = 50 # Times a permutation row is reshuffled to fit its cells' candidates before it is kept anyway.
+
+rng = np.random.default_rng(SEED) # Random generator for the evolutionary runs, so solve() works once imported.
 
 ### MAIN ###
 
-seed()
-grid = importgrid('Grid1.ss')
-t0 = time.time() # Start timer
-best = evolve()
-t1 = time.time() # End timer
-timetaken = t1-t0 # Finds time taken
-print("Running finished. Time taken: " + str(timetaken) + " seconds.")
-print("Best fit: " + str(best[1]))
-print_sudoku(best[0])
-
-
-
-
-
-
+if __name__ == "__main__":
+    rng = np.random.default_rng(SEED)
+    t0 = time.time() # Start timer
+    count, solved = 0, 0
+    skipped = [] # Puzzles that couldn't be read
+    def skip(message):
+        skipped.append(message)
+        print("Skipped " + message)
+    for puzzle, (best, best_fit, status, nodes) in solve_batch(PUZZLES, BACKEND, skip):
+        count += 1
+        solved += status == "solved"
+        print("Puzzle %d: %s%s" % (count, status, "" if nodes is None else " (%d nodes)" % nodes))
+        print_sudoku(best)
+    t1 = time.time() # End timer
+    timetaken = t1-t0 # Finds time taken
+    print("Running finished. Time taken: " + str(timetaken) + " seconds.")
+    print("Solved %d of %d puzzles." % (solved, count) + (" Skipped %d bad puzzles." % len(skipped) if skipped else ""))
+    if TELEMETRY_FILE is not None and telemetry:
+        export_telemetry(TELEMETRY_FILE)
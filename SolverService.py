@@ -0,0 +1,283 @@
+import argparse
+import asyncio
+from concurrent.futures import ProcessPoolExecutor
+import json
+import os
+import time
+
+import numpy as np
+
+from Solvers import puzzle, sudoku
+
+### WORKERS ###
+# These run in the pool processes, which live as long as the service, so the heuristic engines and
+# tables each worker loads (puzzle.enginecache) stay warm from one request to the next.
+
+class SearchTimeout(Exception):
+    """Raised inside a search once its deadline has passed, to abandon it."""
+
+def startworker():
+    """Sets up a pool process."""
+    sudoku.REPORT_INTERVAL = 0 # Evolutionary runs are silent
+
+def solvepuzzle(start, target, heuristic, rows, cols, method, deadline):
+    """Solves a sliding tile puzzle, returning the result as a dictionary.
+    The search checks the deadline every 10000 nodes and gives up once it has passed.
+
+    Keyword arguments:
+    start -- the packed starting grid.
+    target -- the packed target grid.
+    heuristic -- the heuristic choice.
+    rows -- the number of rows.
+    cols -- the number of columns.
+    method -- the search method.
+    deadline -- the time.time() by which the search must finish (None for no limit).
+    """
+    def checkdeadline(record):
+        if time.time() > deadline:
+            raise SearchTimeout()
+    stats = puzzle.SearchStats(10000 if deadline is not None else 0, checkdeadline)
+    try:
+        return puzzle.solve(start, target, heuristic, rows, cols, method, stats).todict()
+    except SearchTimeout:
+        return {"error": "timed out", "timedout": True, "stats": stats.summary()}
+
+def solvesudoku(cells, backend, seed, deadline):
+    """Solves a Sudoku, returning the result as a dictionary.
+
+    Keyword arguments:
+    cells -- the puzzle in the 81 byte form (see SodokuEA.parse_puzzle).
+    backend -- "exact" or "evolve".
+    seed -- the seed for an evolutionary run (None for a fresh one).
+    deadline -- the time.time() by which an evolutionary run must finish (None for no limit).
+    """
+    sudoku.rng = np.random.default_rng(seed)
+    sudoku.TIME_LIMIT = None if deadline is None else max(deadline - time.time(), 0)
+    t0 = time.time()
+    best, fitness, status, nodes = sudoku.solve(sudoku.grid_of(cells), backend)
+    return {"status": status, "solved": status == "solved", "fitness": fitness, "nodes": nodes,
+            "generations": sudoku.generations_run() if backend == "evolve" else None,
+            "solution": "".join(str(number) for row in best for number in row), "time": time.time() - t0}
+
+### SERVICE ###
+
+class SolverService:
+    def __init__(self, workers, queuelimit, defaulttimeout):
+        """Class Initialiser. Answers solve requests, one JSON object per line, on any number of connections.
+        Searches run on a pool of worker processes. Identical requests in flight at the same time share one solve.
+
+        Keyword arguments:
+        workers -- the number of worker processes.
+        queuelimit -- the most solves running or waiting for a worker at once (others wait their turn).
+        defaulttimeout -- the seconds a request may take when it doesn't give a timeout (None for no limit).
+        """
+        self.pool = ProcessPoolExecutor(max_workers=workers, initializer=startworker)
+        self.slots = asyncio.Semaphore(queuelimit)
+        self.defaulttimeout = defaulttimeout
+        self.inflight = {} # Solves running or waiting ({"task", "deadline", "waiters", "started"}), keyed on the canonical request
+        self.targets = {} # Packed target grids already checked, keyed on (tiles, rows, cols)
+        self.counts = {"requests": 0, "solves": 0, "coalesced": 0, "timeouts": 0, "errors": 0}
+
+    def packtarget(self, tiles, rows, cols):
+        """Returns the packed target grid, only checking each distinct target once.
+
+        Keyword arguments:
+        tiles -- the target tiles as a flat list.
+        rows -- the number of rows.
+        cols -- the number of columns.
+        """
+        key = (tuple(tiles), rows, cols)
+        if key not in self.targets:
+            self.targets[key] = puzzle.tilesof(tiles, rows, cols)
+        return self.targets[key]
+
+    def prepare(self, request):
+        """Checks a solve request, returning (key, function, arguments, timeout) for the solve it needs.
+        The key holds only what decides the answer, so identical instances share it.
+
+        Keyword arguments:
+        request -- the request dictionary.
+        """
+        timeout = request.get("timeout", self.defaulttimeout)
+        if timeout is not None:
+            timeout = float(timeout)
+            if not 0 <= timeout < float("inf"): # Also catches NaN
+                raise ValueError("timeout must be a number of seconds from 0 up, or null for no limit")
+        kind = request.get("type", "puzzle")
+        if kind == "puzzle":
+            rows, cols = int(request.get("rows", 3)), int(request.get("cols", 3))
+            heuristic, method = int(request.get("heuristic", 1)), request.get("method", "astar")
+            if method not in puzzle.searchmethods:
+                raise ValueError("method must be one of " + ", ".join(puzzle.searchmethods))
+            if heuristic not in range(0, len(puzzle.heuristicnames)):
+                raise ValueError("heuristic must be between 0 and " + str(len(puzzle.heuristicnames)-1))
+            start = puzzle.tilesof(request["start"], rows, cols)
+            target = self.packtarget(request.get("target", list(range(rows*cols))), rows, cols)
+            return ("puzzle", start, target, heuristic, rows, cols, method), solvepuzzle, (start, target, heuristic, rows, cols, method), timeout
+        if kind == "sudoku":
+            cells = request["puzzle"]
+            if not isinstance(cells, str):
+                cells = "".join(str(number) for row in cells for number in row) # List of rows, as from importgrid
+            cells = sudoku.parse_puzzle(cells)
+            backend = request.get("backend", "exact")
+            if backend not in ("exact", "evolve"):
+                raise ValueError("backend must be 'exact' or 'evolve'")
+            seed = request.get("seed")
+            return ("sudoku", cells, backend, seed), solvesudoku, (cells, backend, seed), timeout
+        raise ValueError("type must be 'puzzle', 'sudoku' or 'stats'")
+
+    async def run(self, key, solve, function, arguments):
+        """Runs one solve on the pool, once a slot is free, and forgets it once it is done.
+        It is skipped if its deadline has passed, or everyone waiting for it has gone, by the time a slot is free.
+
+        Keyword arguments:
+        key -- the canonical request.
+        solve -- its inflight entry.
+        function -- the worker function.
+        arguments -- its arguments, not counting the deadline.
+        """
+        try:
+            async with self.slots:
+                deadline = solve["deadline"]
+                if solve["waiters"] == 0 or (deadline is not None and time.time() >= deadline):
+                    return {"error": "timed out", "timedout": True}
+                solve["started"] = True
+                self.counts["solves"] += 1
+                return await asyncio.get_running_loop().run_in_executor(self.pool, function, *arguments, deadline)
+        finally:
+            if self.inflight.get(key) is solve: # A later solve with a longer deadline may have taken its place
+                del self.inflight[key]
+
+    async def answer(self, request):
+        """Returns the response dictionary for one request.
+
+        Keyword arguments:
+        request -- the request dictionary.
+        """
+        self.counts["requests"] += 1
+        if request.get("type") == "stats":
+            return {"counts": dict(self.counts), "inflight": len(self.inflight)}
+        t0 = time.perf_counter()
+        key, function, arguments, timeout = self.prepare(request)
+        deadline = None if timeout is None else time.time() + timeout # From arrival, so time spent queued counts
+        solve = self.inflight.get(key)
+        # Only share a solve that is allowed to run at least as long as this request may wait
+        coalesced = solve is not None and (solve["deadline"] is None or (deadline is not None and solve["deadline"] >= deadline))
+        if coalesced:
+            self.counts["coalesced"] += 1 # Same instance already being solved, so wait for that
+        else:
+            solve = {"deadline": deadline, "waiters": 0, "started": False}
+            solve["task"] = asyncio.ensure_future(self.run(key, solve, function, arguments))
+            self.inflight[key] = solve
+        solve["waiters"] += 1
+        try:
+            # Shielded, so one caller giving up doesn't cancel the solve for the others sharing it.
+            # The worker stops itself at the deadline; the extra second covers getting the answer back.
+            result = await asyncio.wait_for(asyncio.shield(solve["task"]), None if deadline is None else deadline - time.time() + 1)
+        except asyncio.TimeoutError:
+            result = {"error": "timed out", "timedout": True}
+        finally:
+            solve["waiters"] -= 1
+            if solve["waiters"] == 0 and not solve["started"]:
+                solve["task"].cancel() # Nobody left to answer, so don't let it wait for a slot
+                if self.inflight.get(key) is solve:
+                    del self.inflight[key]
+        if result.get("timedout"):
+            self.counts["timeouts"] += 1
+        response = {"result": result, "coalesced": coalesced, "time": time.perf_counter() - t0}
+        return response
+
+    async def handle(self, line, writer):
+        """Answers one request line, writing the response line back.
+
+        Keyword arguments:
+        line -- the request line.
+        writer -- the connection's StreamWriter.
+        """
+        requestid = None
+        try:
+            request = json.loads(line)
+            if not isinstance(request, dict):
+                raise ValueError("a request must be a JSON object")
+            requestid = request.get("id")
+            response = await self.answer(request)
+        except KeyError as error:
+            self.counts["errors"] += 1
+            response = {"error": "missing field " + str(error)}
+        except Exception as error: # Bad requests, or a solve that failed, are answered rather than ending the service
+            self.counts["errors"] += 1
+            response = {"error": str(error) or type(error).__name__}
+        response["id"] = requestid
+        writer.write((json.dumps(response) + "\n").encode())
+        await writer.drain()
+
+    async def connection(self, reader, writer):
+        """Serves one connection, answering its requests concurrently (responses carry the request's id).
+
+        Keyword arguments:
+        reader -- the connection's StreamReader.
+        writer -- the connection's StreamWriter.
+        """
+        tasks = set()
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                if line.strip():
+                    task = asyncio.ensure_future(self.handle(line, writer))
+                    tasks.add(task)
+                    task.add_done_callback(tasks.discard)
+            if tasks:
+                await asyncio.wait(tasks)
+        except ConnectionError:
+            pass # Client went away
+        finally:
+            writer.close()
+
+    def close(self):
+        """Shuts down the worker processes."""
+        self.pool.shutdown(wait=False, cancel_futures=True)
+
+async def serve(arguments):
+    """Runs the service until it is interrupted.
+
+    Keyword arguments:
+    arguments -- the parsed command line arguments.
+    """
+    service = SolverService(arguments.workers, arguments.queue_limit, arguments.timeout)
+    if arguments.socket is not None:
+        server = await asyncio.start_unix_server(service.connection, path=arguments.socket)
+        where = arguments.socket
+    else:
+        server = await asyncio.start_server(service.connection, host=arguments.host, port=arguments.port)
+        where = "%s:%d" % (arguments.host, arguments.port)
+    print("Solver service listening on " + where, flush=True)
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        service.close()
+
+def parsearguments():
+    """Reads the command line arguments."""
+    parser = argparse.ArgumentParser(description="Long-running solver service. Send one JSON request per line, e.g. "
+                                     '{"id": 1, "type": "puzzle", "start": [7,2,4,5,0,6,8,3,1], "heuristic": 3} or '
+                                     '{"id": 2, "type": "sudoku", "puzzle": "4.....8.5.3...", "backend": "exact"}, '
+                                     'and read one JSON response per line ({"type": "stats"} gives the counters).')
+    parser.add_argument("--host", default="127.0.0.1", help="address to listen on (default: 127.0.0.1)")
+    parser.add_argument("--port", type=int, default=8765, help="port to listen on (default: 8765)")
+    parser.add_argument("--socket", metavar="PATH", help="listen on a Unix socket at PATH instead")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="number of worker processes (default: one per CPU)")
+    parser.add_argument("--queue-limit", type=int, default=None, help="most solves running or waiting at once (default: 4 per worker)")
+    parser.add_argument("--timeout", type=float, default=60.0, help="seconds a request may take unless it says otherwise (default: 60)")
+    arguments = parser.parse_args()
+    if arguments.queue_limit is None:
+        arguments.queue_limit = arguments.workers * 4
+    return arguments
+
+if __name__ == "__main__":
+    try:
+        asyncio.run(serve(parsearguments()))
+    except KeyboardInterrupt:
+        pass
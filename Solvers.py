@@ -0,0 +1,23 @@
+import importlib.util
+import os
+import sys
+
+directory = os.path.dirname(os.path.abspath(__file__))
+
+def loadmodule(name, filename):
+    """Imports one of the solver scripts from this directory (8PuzzleAStar.py can't be imported by name).
+
+    Keyword arguments:
+    name -- the name to register the module under.
+    filename -- the script's file name.
+    """
+    if name in sys.modules:
+        return sys.modules[name]
+    spec = importlib.util.spec_from_file_location(name, os.path.join(directory, filename))
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module # So worker processes started by the module can find it again
+    spec.loader.exec_module(module)
+    return module
+
+puzzle = loadmodule("PuzzleAStar", "8PuzzleAStar.py")
+sudoku = loadmodule("SodokuEA", "SodokuEA.py")